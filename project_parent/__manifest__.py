@@ -2,7 +2,7 @@
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl.html).
 {
     "name": "Project Parent",
-    "version": "17.0.1.0.0",
+    "version": "17.0.1.1.0",
     "license": "LGPL-3",
     "category": "project",
     "author": "Therp B.V., Elico Corp, Odoo Community Association (OCA)",
@@ -10,4 +10,5 @@
     "depends": ["project"],
     "data": ["views/project_parent_views.xml"],
     "demo": ["demo/project_project_demo.xml"],
+    "post_init_hook": "post_init_hook",
 }
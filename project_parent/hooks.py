@@ -0,0 +1,7 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html).
+
+
+def post_init_hook(env):
+    """Fill subtree rollups of existing projects."""
+    projects = env["project.project"].with_context(active_test=False)
+    projects._refresh_subtree_rollups(projects.search([]).ids)
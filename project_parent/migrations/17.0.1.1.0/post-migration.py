@@ -0,0 +1,9 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html).
+
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    projects = env["project.project"].with_context(active_test=False)
+    projects._refresh_subtree_rollups(projects.search([]).ids)
@@ -1,7 +1,15 @@
 # Copyright 2019 Therp BV <https://therp.nl>
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html).
 
-from odoo import api, fields, models
+from collections import Counter, defaultdict
+
+from odoo import _, api, fields, models, tools
+from odoo.tools import SQL, split_every
+
+from odoo.addons.project.models.project_task import CLOSED_STATES
+
+# Amount of projects whose rollups are refreshed per query
+ROLLUP_BATCH_SIZE = 1000
 
 
 class Project(models.Model):
@@ -20,11 +28,250 @@ class Project(models.Model):
 
     child_ids_count = fields.Integer(compute="_compute_child_ids_count", store=True)
 
+    subtree_project_count = fields.Integer(
+        string="Sub-projects (all levels)",
+        readonly=True,
+        copy=False,
+        help="Active descendants of this project, at any depth.",
+    )
+    subtree_task_count = fields.Integer(
+        string="Tasks (all levels)",
+        readonly=True,
+        copy=False,
+        help="Active tasks of this project and its descendants.",
+    )
+    subtree_open_task_count = fields.Integer(
+        string="Open Tasks (all levels)",
+        readonly=True,
+        copy=False,
+        help="Active tasks of this project and its descendants not done "
+        "nor canceled.",
+    )
+    subtree_allocated_hours = fields.Float(
+        string="Allocated Hours (all levels)",
+        readonly=True,
+        copy=False,
+        help="Hours allocated to tasks of this project and its descendants.",
+    )
+
+    def init(self):
+        """Index parent paths for subtree prefix searches in any collation."""
+        res = super().init()
+        tools.create_index(
+            self.env.cr,
+            f"{self._table}_parent_path_prefix_index",
+            self._table,
+            ["parent_path text_pattern_ops"],
+        )
+        return res
+
     @api.depends("child_ids")
     def _compute_child_ids_count(self):
         for project in self:
             project.child_ids_count = len(project.child_ids)
 
+    def _ancestor_ids(self):
+        """Ids of these projects and all their ancestors."""
+        self.flush_recordset(["parent_path"])
+        return {
+            int(project_id)
+            for project in self
+            for project_id in (project.parent_path or "").split("/")
+            if project_id
+        }
+
+    @api.model
+    def _subtree_rollup_aggregates(self):
+        """SQL aggregates of the task rollup fields of a project.
+
+        They are evaluated over the active tasks of each project, as ``task``,
+        then summed over the projects of each subtree. Extend it to roll up
+        more fields.
+        """
+        return {
+            "subtree_task_count": SQL("COUNT(task.id)"),
+            "subtree_open_task_count": SQL(
+                "COUNT(task.id) FILTER (WHERE task.state NOT IN %s)",
+                tuple(CLOSED_STATES),
+            ),
+            "subtree_allocated_hours": SQL("COALESCE(SUM(task.allocated_hours), 0)"),
+        }
+
+    @api.model
+    def _refresh_subtree_rollups(self, project_ids):
+        """Recompute rollups of some projects from their whole subtrees.
+
+        Each batch of projects is refreshed with a single query. Tasks are
+        aggregated once per project, and those totals are added to each
+        ancestor found in the project's ``parent_path``. Like in
+        :meth:`_add_subtree_rollups`, archived projects only count for
+        themselves.
+        """
+        project_ids = sorted(set(project_ids))
+        if not project_ids:
+            return
+        self.flush_model(["parent_path", "active"])
+        self.env["project.task"].flush_model()
+        aggregates = self._subtree_rollup_aggregates()
+        fnames = ["subtree_project_count", *aggregates]
+        for ids in split_every(ROLLUP_BATCH_SIZE, project_ids, list):
+            self.env.cr.execute(
+                SQL(
+                    """
+                    WITH subtree AS (
+                        SELECT path.ancestor_id::int AS ancestor_id, descendant.id
+                        FROM %s descendant, unnest(
+                            string_to_array(rtrim(descendant.parent_path, '/'), '/')
+                        ) AS path(ancestor_id)
+                        WHERE descendant.active
+                            AND path.ancestor_id::int = ANY(%s)
+                        UNION ALL
+                        SELECT id, id FROM %s
+                        WHERE NOT active AND id = ANY(%s)
+                    ), totals AS (
+                        SELECT task.project_id, %s
+                        FROM project_task task
+                        WHERE task.active
+                            AND task.project_id IN (SELECT id FROM subtree)
+                        GROUP BY task.project_id
+                    )
+                    UPDATE %s project SET %s
+                    FROM (
+                        SELECT subtree.ancestor_id AS id,
+                            COUNT(*) FILTER (
+                                WHERE subtree.id != subtree.ancestor_id
+                            ) AS subtree_project_count,
+                            %s
+                        FROM subtree
+                        LEFT JOIN totals ON totals.project_id = subtree.id
+                        GROUP BY subtree.ancestor_id
+                    ) AS rollup
+                    WHERE project.id = rollup.id
+                    """,
+                    SQL.identifier(self._table),
+                    ids,
+                    SQL.identifier(self._table),
+                    ids,
+                    SQL(", ").join(
+                        SQL("%s AS %s", aggregate, SQL.identifier(name))
+                        for name, aggregate in aggregates.items()
+                    ),
+                    SQL.identifier(self._table),
+                    SQL(", ").join(
+                        SQL(
+                            "%s = rollup.%s", SQL.identifier(name), SQL.identifier(name)
+                        )
+                        for name in fnames
+                    ),
+                    SQL(", ").join(
+                        SQL(
+                            "COALESCE(SUM(totals.%s), 0) AS %s",
+                            SQL.identifier(name),
+                            SQL.identifier(name),
+                        )
+                        for name in aggregates
+                    ),
+                )
+            )
+        self.invalidate_model(fnames)
+
+    @api.model
+    def _add_subtree_rollups(self, deltas, strict=False):
+        """Add rollup changes of some projects to them and their ancestors.
+
+        Only the given projects and their ancestors are updated, with a
+        single statement, without aggregating their subtrees again.
+
+        :param dict deltas: ``Counter`` of the change of each rollup field,
+            per project id.
+        :param bool strict: Only update the ancestors of the projects.
+        """
+        projects = self.with_context(active_test=False).browse(deltas).exists()
+        projects.flush_recordset(["parent_path", "active"])
+        totals = defaultdict(Counter)
+        for project in projects:
+            # Like in the subtree aggregates, archived projects only count
+            # for themselves
+            ancestor_ids = [project.id]
+            if project.active:
+                ancestor_ids = [
+                    int(ancestor_id)
+                    for ancestor_id in project.parent_path.split("/")
+                    if ancestor_id
+                ]
+            if strict:
+                # Paths end with the project itself
+                ancestor_ids = ancestor_ids[:-1]
+            for ancestor_id in ancestor_ids:
+                totals[ancestor_id].update(deltas[project.id])
+        fnames = sorted(
+            {
+                fname
+                for total in totals.values()
+                for fname, delta in total.items()
+                if delta
+            }
+        )
+        if not fnames:
+            return
+        ids = list(totals)
+        self.flush_model(fnames)
+        self.env.cr.execute(
+            SQL(
+                """
+                UPDATE %s project SET %s
+                FROM unnest(%s::int[], %s) AS data(id, %s)
+                WHERE project.id = data.id
+                """,
+                SQL.identifier(self._table),
+                SQL(", ").join(
+                    SQL(
+                        "%s = project.%s + data.%s",
+                        SQL.identifier(fname),
+                        SQL.identifier(fname),
+                        SQL.identifier(fname),
+                    )
+                    for fname in fnames
+                ),
+                ids,
+                SQL(", ").join(
+                    SQL(
+                        "%s::%s[]",
+                        [totals[project_id][fname] for project_id in ids],
+                        SQL(self._fields[fname].column_type[1]),
+                    )
+                    for fname in fnames
+                ),
+                SQL(", ").join(SQL.identifier(fname) for fname in fnames),
+            )
+        )
+        self.invalidate_model(fnames)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        res = super().create(vals_list)
+        # Their own tasks are added by task creation
+        self._add_subtree_rollups(
+            {project.id: Counter(subtree_project_count=1) for project in res},
+            strict=True,
+        )
+        return res
+
+    def write(self, vals):
+        moving = {"parent_id", "active"}.intersection(vals)
+        # Former ancestors lose the subtree of moved projects
+        ancestor_ids = self._ancestor_ids() if moving else set()
+        res = super().write(vals)
+        if moving:
+            self._refresh_subtree_rollups(ancestor_ids | self._ancestor_ids())
+        return res
+
+    def unlink(self):
+        ancestor_ids = self._ancestor_ids() - set(self.ids)
+        res = super().unlink()
+        self._refresh_subtree_rollups(self.browse(ancestor_ids).exists().ids)
+        return res
+
     def action_open_child_project(self):
         self.ensure_one()
         ctx = self.env.context.copy()
@@ -40,3 +287,12 @@ class Project(models.Model):
             "context": ctx,
             "domain": domain,
         }
+
+    def action_open_subtree_projects(self):
+        """Open all the descendants of the project, at any depth."""
+        action = self.action_open_child_project()
+        action.update(
+            name=_("Sub-projects of %s") % self.name,
+            domain=[("id", "child_of", self.id), ("id", "!=", self.id)],
+        )
+        return action
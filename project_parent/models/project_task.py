@@ -0,0 +1,65 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html).
+
+from collections import Counter, defaultdict
+
+from odoo import api, models
+
+from odoo.addons.project.models.project_task import CLOSED_STATES
+
+
+class ProjectTask(models.Model):
+    _inherit = "project.task"
+
+    @api.model
+    def _subtree_rollup_fields(self):
+        """Task fields whose change alters the rollups of their projects."""
+        return {"project_id", "active", "stage_id", "state", "allocated_hours"}
+
+    def _subtree_rollup_values(self):
+        """Contribution of these tasks to the rollups of their projects.
+
+        It must match the project subtree aggregates, so rollups can be
+        updated with the difference before and after a change.
+
+        :return: ``Counter`` of rollup field values per project id.
+        """
+        values = defaultdict(Counter)
+        for task in self:
+            if not (task.project_id and task.active):
+                continue
+            project_values = values[task.project_id.id]
+            project_values["subtree_task_count"] += 1
+            if task.state not in CLOSED_STATES:
+                project_values["subtree_open_task_count"] += 1
+            project_values["subtree_allocated_hours"] += task.allocated_hours
+        return values
+
+    @api.model
+    def _add_project_rollups(self, added, removed=None):
+        """Update project rollups with the contribution of added and removed tasks."""
+        deltas = defaultdict(Counter)
+        for project_id, values in added.items():
+            deltas[project_id].update(values)
+        for project_id, values in (removed or {}).items():
+            deltas[project_id].subtract(values)
+        self.env["project.project"].sudo()._add_subtree_rollups(deltas)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        res = super().create(vals_list)
+        self._add_project_rollups(res._subtree_rollup_values())
+        return res
+
+    def write(self, vals):
+        if not self._subtree_rollup_fields().intersection(vals):
+            return super().write(vals)
+        before = self._subtree_rollup_values()
+        res = super().write(vals)
+        self._add_project_rollups(self._subtree_rollup_values(), before)
+        return res
+
+    def unlink(self):
+        before = self._subtree_rollup_values()
+        res = super().unlink()
+        self._add_project_rollups({}, before)
+        return res
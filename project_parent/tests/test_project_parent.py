@@ -26,3 +26,101 @@ class TestProjectParent(TransactionCase):
         self.assertEqual(
             res.get("context").get("default_parent_id"), self.project_project_1.id
         )
+
+    def test_subtree_rollups(self):
+        root = self.env["project.project"].create({"name": "Root"})
+        child = self.env["project.project"].create(
+            {"name": "Child", "parent_id": root.id}
+        )
+        grandchild = self.env["project.project"].create(
+            {"name": "Grandchild", "parent_id": child.id}
+        )
+        self.assertEqual(root.subtree_project_count, 2)
+        self.assertEqual(child.subtree_project_count, 1)
+        task = self.env["project.task"].create(
+            {"name": "Task", "project_id": grandchild.id, "allocated_hours": 3}
+        )
+        self.env["project.task"].create(
+            {"name": "Other", "project_id": child.id, "allocated_hours": 2}
+        )
+        self.assertEqual(root.subtree_task_count, 2)
+        self.assertEqual(root.subtree_open_task_count, 2)
+        self.assertEqual(root.subtree_allocated_hours, 5)
+        self.assertEqual(grandchild.subtree_allocated_hours, 3)
+        task.state = "1_done"
+        self.assertEqual(root.subtree_open_task_count, 1)
+        self.assertEqual(root.subtree_task_count, 2)
+        task.allocated_hours = 4
+        self.assertEqual(root.subtree_allocated_hours, 6)
+        self.assertEqual(child.subtree_allocated_hours, 6)
+        task.active = False
+        self.assertEqual(root.subtree_task_count, 1)
+        self.assertEqual(grandchild.subtree_allocated_hours, 0)
+        task.active = True
+        # Moving a subtree updates former and new ancestors
+        grandchild.parent_id = root
+        self.assertEqual(child.subtree_project_count, 0)
+        self.assertEqual(child.subtree_allocated_hours, 2)
+        self.assertEqual(root.subtree_project_count, 2)
+        self.assertEqual(root.subtree_allocated_hours, 6)
+        task.project_id = child
+        self.assertEqual(grandchild.subtree_task_count, 0)
+        self.assertEqual(child.subtree_allocated_hours, 6)
+        # Incremental updates match a full aggregation
+        projects = root | child | grandchild
+        fnames = [
+            "subtree_project_count",
+            "subtree_task_count",
+            "subtree_open_task_count",
+            "subtree_allocated_hours",
+        ]
+        values = projects.read(fnames)
+        projects._refresh_subtree_rollups(projects.ids)
+        self.assertEqual(projects.read(fnames), values)
+        child.active = False
+        self.assertEqual(root.subtree_project_count, 1)
+        grandchild.unlink()
+        self.assertEqual(root.subtree_project_count, 0)
+        # New projects count for all their ancestors, even archived ones
+        great = self.env["project.project"].create(
+            {"name": "Under archived", "parent_id": child.id}
+        )
+        self.assertEqual(root.subtree_project_count, 1)
+        self.assertEqual(child.subtree_project_count, 1)
+        projects = root | child | great
+        values = projects.read(fnames)
+        projects._refresh_subtree_rollups(projects.ids)
+        self.assertEqual(projects.read(fnames), values)
+
+    def test_action_open_subtree_projects(self):
+        grandchild = self.env["project.project"].create(
+            {"name": "Grandchild", "parent_id": self.project_project_3.id}
+        )
+        res = self.project_project_1.action_open_subtree_projects()
+        projects = self.env["project.project"].search(res["domain"])
+        self.assertIn(grandchild, projects)
+        self.assertIn(self.project_project_3, projects)
+        self.assertNotIn(self.project_project_1, projects)
+        self.assertEqual(res["context"]["default_parent_id"], self.project_project_1.id)
+
+    def test_subtree_rollups_queries(self):
+        """Rollups are refreshed with the same queries whatever the depth."""
+        parent = self.env["project.project"].create({"name": "Level 0"})
+        chain = [parent]
+        for level in range(1, 10):
+            chain.append(
+                self.env["project.project"].create(
+                    {"name": "Level %d" % level, "parent_id": chain[-1].id}
+                )
+            )
+
+        def queries(project):
+            self.env.flush_all()
+            count = self.env.cr.sql_log_count
+            self.env["project.task"].create({"name": "Task", "project_id": project.id})
+            self.env.flush_all()
+            return self.env.cr.sql_log_count - count
+
+        queries(chain[0])
+        self.assertEqual(queries(chain[1]), queries(chain[-1]))
+        self.assertEqual(parent.subtree_task_count, 3)
@@ -15,8 +15,11 @@
     "installable": True,
     "depends": ["project"],
     "data": [
+        "data/ir_actions_server.xml",
+        "data/ir_cron.xml",
         "data/ir_sequence.xml",
         "views/project_project.xml",
         "wizards/res_config_settings_view.xml",
     ],
+    "post_init_hook": "post_init_hook",
 }
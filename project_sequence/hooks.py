@@ -0,0 +1,6 @@
+# License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl-3.0)
+
+
+def post_init_hook(env):
+    """Give sequence codes to projects that existed before installing."""
+    env["project.project"]._backfill_sequence_codes()
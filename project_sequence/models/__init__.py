@@ -1 +1,2 @@
+from . import ir_sequence
 from . import project_project
@@ -0,0 +1,80 @@
+# Copyright 2023 Moduon Team S.L.
+# License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl-3.0)
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+from odoo.addons.base.models.ir_sequence import _update_nogap
+
+
+class IrSequence(models.Model):
+    _inherit = "ir.sequence"
+
+    @api.model
+    def _next_block_by_code(self, sequence_code, count, sequence_date=None):
+        """Like ``next_by_code()``, but reserving ``count`` numbers at once.
+
+        :return: List of ``count`` formatted sequence values, or of ``False``
+            if there is no sequence with that code.
+        """
+        if count <= 0:
+            return []
+        self.check_access_rights("read")
+        sequence = self.search(
+            [
+                ("code", "=", sequence_code),
+                ("company_id", "in", [self.env.company.id, False]),
+            ],
+            order="company_id",
+            limit=1,
+        )
+        if not sequence:
+            return [False] * count
+        return sequence._next_block(count, sequence_date=sequence_date)
+
+    def _next_block(self, count, sequence_date=None):
+        """Reserve ``count`` numbers of this sequence in a single query.
+
+        Numbers are unique even under concurrent transactions. With the
+        ``no_gap`` implementation they are also contiguous. With the
+        ``standard`` one they are contiguous unless another transaction
+        draws numbers from the same sequence at the very same time.
+        The prefix and suffix are interpolated only once for the block.
+        """
+        self.ensure_one()
+        record, pg_sequence = self, "ir_sequence_%03d" % self.id
+        sequence = self
+        if self.use_date_range:
+            dt = sequence_date or self._context.get(
+                "ir_sequence_date", fields.Date.today()
+            )
+            record = self.env["ir.sequence.date_range"].search(
+                [
+                    ("sequence_id", "=", self.id),
+                    ("date_from", "<=", dt),
+                    ("date_to", ">=", dt),
+                ],
+                limit=1,
+            ) or self._create_date_range_seq(dt)
+            pg_sequence = "ir_sequence_%03d_%03d" % (self.id, record.id)
+            sequence = self.with_context(ir_sequence_date_range=record.date_from)
+        if self.implementation == "standard":
+            self.env.cr.execute(
+                SQL(
+                    "SELECT nextval(%s) FROM generate_series(1, %s) ORDER BY 1",
+                    pg_sequence,
+                    count,
+                )
+            )
+            numbers = [row[0] for row in self.env.cr.fetchall()]
+        else:
+            first = _update_nogap(record, self.number_increment * count)
+            numbers = range(
+                first,
+                first + self.number_increment * count,
+                self.number_increment,
+            )
+        prefix, suffix = sequence._get_prefix_suffix()
+        return [
+            "%s%0*d%s" % (prefix, self.padding, number, suffix) for number in numbers
+        ]
@@ -1,8 +1,41 @@
 # Copyright 2023 Moduon Team S.L.
 # License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl-3.0)
 
+import itertools
+import logging
+import re
+import threading
+from collections import defaultdict
 
-from odoo import api, fields, models
+from odoo import _, api, fields, models, tools
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_DISPLAY_NAME_PATTERN = "%(sequence_code)s - %(name)s"
+# Last project id whose analytic account name was synced by the pending job
+SYNC_PROGRESS_PARAM = "project_sequence.analytic_account_sync_last_id"
+# Autocomplete inputs that look like the start of a sequence code
+SEQUENCE_CODE_INPUT = re.compile(r"^\s*\d+-\d*\s*$")
+
+
+def compile_display_name_pattern(pattern):
+    """Get a function formatting project display names with a pattern.
+
+    :raise ValueError: If the pattern cannot be applied to projects.
+    """
+    try:
+        pattern % {"name": "", "sequence_code": ""}
+    except (KeyError, TypeError, ValueError) as error:
+        raise ValueError(
+            _("Invalid project display name pattern %(pattern)r: %(error)s")
+            % {"pattern": pattern, "error": error}
+        ) from error
+
+    def formatter(name, sequence_code):
+        return pattern % {"name": name, "sequence_code": sequence_code}
+
+    return formatter
 
 
 class ProjectProject(models.Model):
@@ -20,44 +53,239 @@ class ProjectProject(models.Model):
     sequence_code = fields.Char(
         copy=False,
         readonly=True,
+        # Trigram indexes serve ilike searches, falling back to btree
+        # when pg_trgm is not available
+        index="trigram",
     )
     name = fields.Char(
         # We actually require it with the SQL constraint, but it is disabled
         # here to let users create/write projects without name, and let this module
         # add a default name if needed
         required=False,
+        index="trigram",
     )
 
+    def init(self):
+        """Index sequence codes for prefix searches in any collation."""
+        res = super().init()
+        tools.create_index(
+            self.env.cr,
+            f"{self._table}_sequence_code_prefix_index",
+            self._table,
+            ["sequence_code text_pattern_ops"],
+        )
+        # Backfill chunks read projects without code in creation order
+        tools.create_index(
+            self.env.cr,
+            f"{self._table}_sequence_code_missing_index",
+            self._table,
+            ["create_date", "id"],
+            where="sequence_code IS NULL",
+        )
+        return res
+
     def _sync_analytic_account_name(self):
-        """Set analytic account name equal to project's display name."""
-        for rec in self:
-            if not rec.analytic_account_id:
-                continue
-            rec.analytic_account_id.name = rec.display_name
+        """Set analytic account name equal to project's display name.
 
-    @api.depends("sequence_code", "name")
-    def _compute_display_name(self):
-        res = super()._compute_display_name()
-        sequence_pattern = (
+        All analytic accounts are renamed with a single statement. It does
+        not go through ``write()``, so overrides of other modules are not
+        called, but name changes are still tracked in the accounts' chatter.
+        """
+        names = {
+            rec.analytic_account_id: rec.display_name
+            for rec in self
+            if rec.analytic_account_id
+            and rec.analytic_account_id.name != rec.display_name
+        }
+        if not names:
+            return
+        accounts = self.env["account.analytic.account"].union(*names)
+        accounts.check_access_rights("write")
+        accounts.check_access_rule("write")
+        accounts.flush_recordset(["name"])
+        # Old names are compared with the new ones when tracking is finalized
+        accounts._track_prepare(["name"])
+        value = SQL("data.name")
+        if accounts._fields["name"].translate:
+            # Update the current language, keeping a value for en_US
+            lang = self.env.lang or "en_US"
+            value = SQL(
+                """
+                COALESCE(account.name, '{}'::jsonb)
+                || jsonb_build_object(
+                    'en_US', COALESCE(account.name->>'en_US', data.name)
+                )
+                || jsonb_build_object(%s::text, data.name)
+                """,
+                lang,
+            )
+        self.env.cr.execute(
+            SQL(
+                """
+                UPDATE account_analytic_account account
+                SET name = %s, write_uid = %s, write_date = now() at time zone 'UTC'
+                FROM unnest(%s::int[], %s::varchar[]) AS data(id, name)
+                WHERE account.id = data.id
+                """,
+                value,
+                self.env.uid,
+                accounts.ids,
+                [names[account] for account in accounts],
+            )
+        )
+        accounts.invalidate_recordset(["name", "write_uid", "write_date"])
+        accounts.modified(["name"])
+
+    @api.model
+    def _schedule_analytic_account_name_sync(self):
+        """Resync all analytic account names in the background, from scratch."""
+        self.env["ir.config_parameter"].sudo().set_param(SYNC_PROGRESS_PARAM, 0)
+        self.env.ref("project_sequence.ir_cron_sync_analytic_account_names")._trigger()
+
+    @api.model
+    def _cron_sync_analytic_account_names(self, chunk_size=1000):
+        """Sync analytic account names of all projects, if scheduled.
+
+        Projects are processed in id order, committing after each chunk and
+        saving the progress, so the job never holds a long transaction and
+        resumes where it stopped if interrupted.
+        """
+        params = self.env["ir.config_parameter"].sudo()
+        last_id = params.get_param(SYNC_PROGRESS_PARAM)
+        if last_id is False:
+            return
+        auto_commit = not getattr(threading.current_thread(), "testing", False)
+        projects_model = self.with_context(active_test=False)
+        domain = [("analytic_account_id", "!=", False)]
+        last_id = int(last_id)
+        total = projects_model.search_count(domain + [("id", ">", last_id)])
+        done = 0
+        while True:
+            projects = projects_model.search(
+                domain + [("id", ">", last_id)], order="id", limit=chunk_size
+            )
+            if not projects:
+                break
+            projects._sync_analytic_account_name()
+            last_id = projects[-1].id
+            done += len(projects)
+            params.set_param(SYNC_PROGRESS_PARAM, last_id)
+            if auto_commit:
+                self.env.cr.commit()  # pylint: disable=invalid-commit
+            self.env.invalidate_all()
+            _logger.info("Synced analytic account names of %d/%d projects", done, total)
+        params.set_param(SYNC_PROGRESS_PARAM, False)
+
+    @api.model
+    def _backfill_sequence_codes(self, chunk_size=1000, auto_commit=False):
+        """Assign sequence codes to projects lacking one, in creation order.
+
+        Codes are reserved in blocks per creation day, so each project gets
+        the date range of its creation, and written with one statement per
+        chunk. With ``auto_commit``, each chunk is committed, so it can be
+        interrupted and run again. Install hooks leave it off, so a failure
+        rolls the whole backfill back along with the module state.
+
+        :param bool auto_commit: Commit after each chunk. Ignored in tests.
+        :return: Amount of projects that got a sequence code.
+        """
+        auto_commit = auto_commit and not getattr(
+            threading.current_thread(), "testing", False
+        )
+        sequences = self.env["ir.sequence"].sudo()
+        self.flush_model(["sequence_code"])
+        done = 0
+        while True:
+            self.env.cr.execute(
+                SQL(
+                    """
+                    SELECT id, create_date FROM %s
+                    WHERE sequence_code IS NULL
+                    ORDER BY create_date, id
+                    LIMIT %s
+                    """,
+                    SQL.identifier(self._table),
+                    chunk_size,
+                )
+            )
+            rows = self.env.cr.fetchall()
+            if not rows:
+                break
+            ids, codes = [], []
+            for day, day_rows in itertools.groupby(
+                rows, key=lambda row: row[1] and row[1].date()
+            ):
+                day_ids = [row[0] for row in day_rows]
+                ids += day_ids
+                codes += sequences._next_block_by_code(
+                    "project.sequence", len(day_ids), sequence_date=day or None
+                )
+            if not all(codes):
+                _logger.warning("No project.sequence sequence to backfill codes")
+                break
+            self.env.cr.execute(
+                SQL(
+                    """
+                    UPDATE %s project SET sequence_code = data.code
+                    FROM unnest(%s::int[], %s::varchar[]) AS data(id, code)
+                    WHERE project.id = data.id
+                    """,
+                    SQL.identifier(self._table),
+                    ids,
+                    codes,
+                )
+            )
+            done += len(ids)
+            if auto_commit:
+                self.env.cr.commit()  # pylint: disable=invalid-commit
+            _logger.info("Assigned sequence codes to %d projects", done)
+        self.invalidate_model(["sequence_code", "display_name"])
+        if done:
+            # Display names changed, so analytic accounts need them too
+            self._schedule_analytic_account_name_sync()
+        return done
+
+    @api.model
+    @tools.ormcache()
+    def _display_name_formatter(self):
+        """Compiled display name pattern.
+
+        Cached until system parameters change, which clears this cache.
+        """
+        pattern = (
             self.env["ir.config_parameter"]
             .sudo()
             .get_param(
                 "project_sequence.display_name_pattern",
-                default="%(sequence_code)s - %(name)s",
+                default=DEFAULT_DISPLAY_NAME_PATTERN,
             )
         )
-        for project in self.filtered(
-            lambda pr: pr.sequence_code and pr.sequence_code != pr.name
-        ):
-            project.display_name = sequence_pattern % {
-                "name": project.name,
-                "sequence_code": project.sequence_code,
-            }
+        try:
+            return compile_display_name_pattern(pattern)
+        except ValueError:
+            _logger.warning("Invalid project display name pattern %r", pattern)
+            return compile_display_name_pattern(DEFAULT_DISPLAY_NAME_PATTERN)
+
+    @api.depends("sequence_code", "name")
+    def _compute_display_name(self):
+        res = super()._compute_display_name()
+        formatter = self._display_name_formatter()
+        for project in self:
+            if project.sequence_code and project.sequence_code != project.name:
+                project.display_name = formatter(project.name, project.sequence_code)
         return res
 
     @api.model
     def name_search(self, name="", args=None, operator="ilike", limit=100):
         """Allow searching by sequence code by default."""
+        # Inputs looking like a sequence code are searched as its prefix first
+        if operator == "ilike" and SEQUENCE_CODE_INPUT.match(name or ""):
+            projects = self.search(
+                (args or []) + [("sequence_code", "=like", name.strip() + "%")],
+                limit=limit,
+            )
+            if projects:
+                return [(project.id, project.display_name) for project in projects]
         # Do not add any domain when user just clicked on search widget
         if not (name == "" and operator == "ilike"):
             # The dangling | is needed to combine with the domain added by super()
@@ -69,11 +297,14 @@ class ProjectProject(models.Model):
         """Apply sequence code and a default name if not set."""
         # It is important to set sequence_code before calling super() because
         # other modules such as hr_timesheet expect the name to always have a value
+        missing = [vals for vals in vals_list if "sequence_code" not in vals]
+        # Reserve all needed numbers at once, instead of one lookup per project
+        codes = self.env["ir.sequence"]._next_block_by_code(
+            "project.sequence", len(missing)
+        )
+        for vals, code in zip(missing, codes, strict=True):
+            vals["sequence_code"] = code
         for vals in vals_list:
-            if "sequence_code" not in vals:
-                vals["sequence_code"] = self.env["ir.sequence"].next_by_code(
-                    "project.sequence"
-                )
             if not vals.get("name"):
                 vals["name"] = vals["sequence_code"]
         res = super().create(vals_list)
@@ -85,12 +316,19 @@ class ProjectProject(models.Model):
     def write(self, vals):
         """Sync name and analytic account name when name is changed."""
         # If name isn't changing, nothing special to do
-        if "name" not in vals and "sequence_name" not in vals:
+        if "name" not in vals and "sequence_code" not in vals:
             return super().write(vals)
+        if "name" not in vals:
+            super().write(vals)
+        else:
+            # Empty names fall back to each project's sequence code, so write
+            # once per resulting name
+            ids_per_name = defaultdict(list)
+            for one in self:
+                sequence_code = vals.get("sequence_code", one.sequence_code)
+                ids_per_name[vals["name"] or sequence_code].append(one.id)
+            for name, ids in ids_per_name.items():
+                super(ProjectProject, self.browse(ids)).write(dict(vals, name=name))
         # When changing name, we need to update the analytic account name too
-        for one in self:
-            sequence_code = vals.get("sequence_code", one.sequence_code)
-            name = vals.get("name") or sequence_code
-            super().write(dict(vals, name=name))
         self._sync_analytic_account_name()
         return True
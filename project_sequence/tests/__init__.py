@@ -1 +1,2 @@
 from . import test_project_sequence
+from . import test_project_sequence_benchmark
@@ -4,9 +4,12 @@ from freezegun import freeze_time
 from psycopg2 import IntegrityError
 
 from odoo import fields
+from odoo.exceptions import ValidationError
 from odoo.tests.common import Form, TransactionCase, new_test_user, users
 from odoo.tools import mute_logger
 
+from odoo.addons.project_sequence.models.project_project import SYNC_PROGRESS_PARAM
+
 
 @freeze_time("2023-01-01 12:00:00")
 class TestProjectSequence(TransactionCase):
@@ -156,6 +159,15 @@ class TestProjectSequence(TransactionCase):
         proj.analytic_account_id = analytic_account
         proj._sync_analytic_account_name()
         self.assertEqual(proj.analytic_account_id.name, proj.display_name)
+        # Renames are tracked although they bypass write()
+        proj.name = "two"
+        self.env.flush_all()
+        self.env.cr.precommit.run()
+        tracking = analytic_account.message_ids.tracking_value_ids.filtered(
+            lambda value: value.field_id.name == "name"
+        )
+        self.assertEqual(tracking[:1].old_value_char, "23-00011 - one")
+        self.assertEqual(tracking[:1].new_value_char, "23-00011 - two")
 
         # Test when analytic_account_id is not set
         proj.analytic_account_id = False
@@ -182,3 +194,176 @@ class TestProjectSequence(TransactionCase):
         self.assertIn((proj2.id, "23-00012 - two"), results)
         self.assertNotIn((proj1.id, "23-00011 - one"), results)
         self.assertNotIn((proj3.id, "23-00013 - three"), results)
+
+        # Search by sequence code prefix
+        results = self.env["project.project"].name_search("23-0001", limit=2)
+        self.assertEqual(
+            results, [(proj1.id, "23-00011 - one"), (proj2.id, "23-00012 - two")]
+        )
+        results = self.env["project.project"].name_search(
+            "23-", args=[("id", "=", proj3.id)]
+        )
+        self.assertEqual(results, [(proj3.id, "23-00013 - three")])
+
+        # Search by sequence code part
+        results = self.env["project.project"].name_search("0013")
+        self.assertEqual(results, [(proj3.id, "23-00013 - three")])
+
+    @users("manager")
+    def test_sequence_block(self):
+        """Projects created together get a block of sequence codes."""
+        projects = self.env["project.project"].create(
+            [{"name": "one"}, {"name": "two", "sequence_code": "X"}, {"name": "three"}]
+        )
+        self.assertEqual(
+            projects.mapped("sequence_code"), ["23-00011", "X", "23-00012"]
+        )
+        proj = self.env["project.project"].create({"name": "four"})
+        self.assertEqual(proj.sequence_code, "23-00013")
+
+    def test_sequence_block_no_gap(self):
+        """Blocks of no gap sequences are contiguous."""
+        self.pjr_seq.implementation = "no_gap"
+        self.pjr_seq._get_current_sequence().number_next = 11
+        projects = self.env["project.project"].create(
+            [{"name": str(index)} for index in range(3)]
+        )
+        self.assertEqual(
+            projects.mapped("sequence_code"), ["23-00011", "23-00012", "23-00013"]
+        )
+        self.assertEqual(self.pjr_seq._get_current_sequence().number_next, 14)
+
+    def _rename_queries(self, projects, name):
+        """Count queries needed to rename some projects."""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        queries = self.cr.sql_log_count
+        projects.write({"name": name})
+        self.env.flush_all()
+        return self.cr.sql_log_count - queries
+
+    def test_write_name_batched(self):
+        """Renaming projects needs the same queries for any amount of them."""
+        default_plan = self.env["account.analytic.plan"].search([], limit=1)
+        projects = self.env["project.project"].create(
+            [
+                {
+                    "name": "project %d" % index,
+                    "analytic_account_id": self.env["account.analytic.account"]
+                    .create({"name": "account %d" % index, "plan_id": default_plan.id})
+                    .id,
+                }
+                for index in range(6)
+            ]
+        )
+        self.assertEqual(
+            projects.analytic_account_id.mapped("name"),
+            ["23-%05d - project %d" % (11 + index, index) for index in range(6)],
+        )
+        # Warm up caches that only fill once per registry
+        self._rename_queries(projects[:2], "warm")
+        self.assertEqual(
+            self._rename_queries(projects[2:], "renamed"),
+            self._rename_queries(projects[:2], "renamed"),
+        )
+        self.assertEqual(
+            projects.analytic_account_id.mapped("name"),
+            ["23-%05d - renamed" % (11 + index) for index in range(6)],
+        )
+        # Emptied names fall back to each sequence code
+        projects.write({"name": False})
+        self.assertEqual(projects.mapped("name"), projects.mapped("sequence_code"))
+        self.assertEqual(
+            projects.analytic_account_id.mapped("name"),
+            projects.mapped("sequence_code"),
+        )
+
+    def test_invalid_pattern(self):
+        """Display name patterns are validated when saved."""
+        with self.assertRaises(ValidationError):
+            self.env["res.config.settings"].create(
+                {"project_display_name_pattern": "%(code)s"}
+            )
+        # Patterns set by other means fall back to the default one
+        self.env["ir.config_parameter"].set_param(
+            "project_sequence.display_name_pattern", "%(name)d"
+        )
+        with mute_logger("odoo.addons.project_sequence.models.project_project"):
+            proj = self.env["project.project"].create({"name": "one"})
+            self.assertEqual(proj.display_name, "23-00011 - one")
+
+    def test_display_name_queries(self):
+        """Display names need the same queries for any amount of projects."""
+        projects = self.env["project.project"].create(
+            [{"name": "project %d" % index} for index in range(10)]
+        )
+        counts = []
+        for records in (projects[:2], projects[:2], projects):
+            self.env.invalidate_all()
+            queries = self.cr.sql_log_count
+            records.mapped("display_name")
+            counts.append(self.cr.sql_log_count - queries)
+        self.assertEqual(counts[1], counts[2])
+
+    def test_sync_analytic_account_names_job(self):
+        """Changing the pattern resyncs analytic account names in chunks."""
+        default_plan = self.env["account.analytic.plan"].search([], limit=1)
+        projects = self.env["project.project"].create(
+            [
+                {
+                    "name": "project %d" % index,
+                    "analytic_account_id": self.env["account.analytic.account"]
+                    .create({"name": "account %d" % index, "plan_id": default_plan.id})
+                    .id,
+                }
+                for index in range(3)
+            ]
+        )
+        params = self.env["ir.config_parameter"]
+        # Saving the settings with the default pattern changes nothing
+        params.set_param("project_sequence.display_name_pattern", False)
+        self.env["res.config.settings"].create({}).execute()
+        self.assertFalse(params.get_param(SYNC_PROGRESS_PARAM))
+        self.env["res.config.settings"].create(
+            {"project_display_name_pattern": "%(name)s [%(sequence_code)s]"}
+        ).execute()
+        self.assertEqual(params.get_param(SYNC_PROGRESS_PARAM), "0")
+        self.env["project.project"]._cron_sync_analytic_account_names(chunk_size=2)
+        self.assertEqual(
+            projects.analytic_account_id.mapped("name"),
+            ["project %d [23-%05d]" % (index, 11 + index) for index in range(3)],
+        )
+        self.assertFalse(params.get_param(SYNC_PROGRESS_PARAM))
+        # Nothing is done unless scheduled
+        projects.analytic_account_id[0].name = "manual"
+        self.env["project.project"]._cron_sync_analytic_account_names()
+        self.assertEqual(projects.analytic_account_id[0].name, "manual")
+        self.env["res.config.settings"].create({}).action_sync_analytic_account_names()
+        self.env["project.project"]._cron_sync_analytic_account_names()
+        self.assertEqual(projects.analytic_account_id[0].name, "project 0 [23-00011]")
+
+    def test_backfill_sequence_codes(self):
+        """Projects without sequence code get one in creation order."""
+        projects = self.env["project.project"].create(
+            [{"name": str(index), "sequence_code": False} for index in range(3)]
+        )
+        self.env.flush_all()
+        for project, create_date in zip(
+            projects,
+            ["2022-05-02 10:00:00", "2022-05-01 10:00:00", "2022-05-02 09:00:00"],
+            strict=True,
+        ):
+            self.env.cr.execute(
+                "UPDATE project_project SET create_date = %s WHERE id = %s",
+                (create_date, project.id),
+            )
+        self.env["project.project"].invalidate_model()
+        done = self.env["project.project"]._backfill_sequence_codes(chunk_size=2)
+        self.assertGreaterEqual(done, 3)
+        self.assertEqual(
+            projects.mapped("sequence_code"), ["22-00003", "22-00001", "22-00002"]
+        )
+        self.assertEqual(projects[1].display_name, "22-00001 - 1")
+        self.assertFalse(
+            self.env["project.project"].search_count([("sequence_code", "=", False)])
+        )
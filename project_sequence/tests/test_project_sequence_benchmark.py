@@ -0,0 +1,93 @@
+# License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl-3.0)
+
+import json
+import logging
+import os
+import time
+
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged("-standard", "-at_install", "post_install", "project_sequence_benchmark")
+class TestProjectSequenceBenchmark(TransactionCase):
+    """Measure project autocomplete latency on many projects.
+
+    The amount of projects is read from ``PROJECT_SEQUENCE_BENCHMARK_PROJECTS``
+    and the JSON report is written to ``PROJECT_SEQUENCE_BENCHMARK_REPORT``
+    when set.
+    """
+
+    searches = {
+        "sequence_code_prefix": "26-001",
+        "sequence_code_part": "0042",
+        "name_part": "ject 12",
+        "no_match": "nothing like this",
+    }
+    repetitions = 10
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.projects_amount = int(
+            os.environ.get("PROJECT_SEQUENCE_BENCHMARK_PROJECTS", 300000)
+        )
+        cls._seed_projects()
+
+    @classmethod
+    def _seed_projects(cls):
+        """Copy a template project row in SQL, the ORM would take too long."""
+        template = cls.env["project.project"].create({"name": "Template"})
+        cls.env.flush_all()
+        cls.env.cr.execute(
+            """
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = 'project_project'
+                AND column_name NOT IN ('id', 'name', 'sequence_code', 'alias_id')
+            """
+        )
+        columns = [SQL.identifier(row[0]) for row in cls.env.cr.fetchall()]
+        cls.env.cr.execute(
+            SQL(
+                """
+                INSERT INTO project_project (name, sequence_code, %s)
+                SELECT jsonb_build_object('en_US', 'Project ' || n),
+                    '26-' || lpad(n::text, 6, '0'), %s
+                FROM project_project, generate_series(1, %s) AS n
+                WHERE project_project.id = %s
+                """,
+                SQL(", ").join(columns),
+                SQL(", ").join(columns),
+                cls.projects_amount,
+                template.id,
+            )
+        )
+        cls.env.cr.execute("ANALYZE project_project")
+
+    def test_name_search(self):
+        results = []
+        project_model = self.env["project.project"]
+        for search, name in self.searches.items():
+            project_model.name_search(name)
+            start = time.perf_counter()
+            for _index in range(self.repetitions):
+                found = project_model.name_search(name)
+                self.env.invalidate_all()
+            results.append(
+                {
+                    "search": search,
+                    "input": name,
+                    "found": len(found),
+                    "milliseconds": round(
+                        (time.perf_counter() - start) * 1000 / self.repetitions, 2
+                    ),
+                }
+            )
+        report = {"projects": self.projects_amount, "results": results}
+        path = os.environ.get("PROJECT_SEQUENCE_BENCHMARK_REPORT")
+        if path:
+            with open(path, "w") as report_file:
+                json.dump(report, report_file, indent=2)
+        _logger.info("Project name_search benchmark: %s", json.dumps(report))
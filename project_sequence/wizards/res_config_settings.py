@@ -1,8 +1,13 @@
 # Copyright 2023 Moduon Team S.L.
 # License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl-3.0)
 
+from odoo import api, fields, models
+from odoo.exceptions import ValidationError
 
-from odoo import fields, models
+from ..models.project_project import (
+    DEFAULT_DISPLAY_NAME_PATTERN,
+    compile_display_name_pattern,
+)
 
 
 class ResConfigSettings(models.TransientModel):
@@ -10,9 +15,35 @@ class ResConfigSettings(models.TransientModel):
 
     project_display_name_pattern = fields.Char(
         config_parameter="project_sequence.display_name_pattern",
-        default="%(sequence_code)s - %(name)s",
+        default=DEFAULT_DISPLAY_NAME_PATTERN,
         help=(
             "Use %(sequence_code)s and %(name)s to include the sequence code "
             "and the name of the project in the display name."
         ),
     )
+
+    @api.constrains("project_display_name_pattern")
+    def _check_project_display_name_pattern(self):
+        for settings in self.filtered("project_display_name_pattern"):
+            try:
+                compile_display_name_pattern(settings.project_display_name_pattern)
+            except ValueError as error:
+                raise ValidationError(str(error)) from error
+
+    def set_values(self):
+        params = self.env["ir.config_parameter"].sudo()
+        # An unset parameter means the default pattern is in use
+        old_pattern = params.get_param(
+            "project_sequence.display_name_pattern", DEFAULT_DISPLAY_NAME_PATTERN
+        )
+        res = super().set_values()
+        new_pattern = params.get_param(
+            "project_sequence.display_name_pattern", DEFAULT_DISPLAY_NAME_PATTERN
+        )
+        if new_pattern != old_pattern:
+            self.env["project.project"]._schedule_analytic_account_name_sync()
+        return res
+
+    def action_sync_analytic_account_names(self):
+        """Resync analytic account names of all projects in the background."""
+        self.env["project.project"]._schedule_analytic_account_name_sync()
@@ -1,5 +1,6 @@
 # License AGPL-3 - See http://www.gnu.org/licenses/agpl-3.0.html
 
+from . import controllers
 from . import models
 from . import wizards
-from .hooks import post_init_hook
+from .hooks import post_init_hook, pre_init_hook
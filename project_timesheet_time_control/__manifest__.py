@@ -6,7 +6,7 @@
 
 {
     "name": "Project timesheet time control",
-    "version": "17.0.1.0.0",
+    "version": "17.0.1.3.0",
     "category": "Project",
     "author": "Tecnativa," "Odoo Community Association (OCA)",
     "maintainers": ["ernestotejeda"],
@@ -16,12 +16,25 @@
     ],
     "data": [
         "security/ir.model.access.csv",
+        "security/hr_timesheet_time_control_security.xml",
+        "data/ir_cron.xml",
         "views/account_analytic_line_view.xml",
         "views/project_project_view.xml",
         "views/project_task_view.xml",
+        "views/hr_timesheet_time_control_running_view.xml",
+        "views/hr_timesheet_time_control_summary_view.xml",
         "wizards/hr_timesheet_switch_view.xml",
+        "wizards/hr_timesheet_time_control_export_view.xml",
+        "wizards/hr_timesheet_time_control_import_view.xml",
+        "wizards/res_config_settings_view.xml",
     ],
+    "assets": {
+        "web.assets_backend": [
+            "project_timesheet_time_control/static/src/js/*.esm.js",
+        ],
+    },
     "license": "AGPL-3",
     "installable": True,
+    "pre_init_hook": "pre_init_hook",
     "post_init_hook": "post_init_hook",
 }
@@ -0,0 +1,52 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import fields, http
+from odoo.http import content_disposition, request
+
+EXPORT_MIMETYPES = {
+    "csv": "text/csv;charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class TimeControlController(http.Controller):
+    @http.route("/project_timesheet_time_control/heartbeat", type="json", auth="user")
+    def heartbeat(self):
+        """Keep the current user's running timers from being stopped as idle."""
+        return request.env["hr.timesheet.time_control.state"]._heartbeat()
+
+    @http.route("/project_timesheet_time_control/switch", type="json", auth="user")
+    def switch(self, project_id=False, task_id=False, name=False):
+        """Stop the running timer and start a new one in a single request."""
+        return request.env["account.analytic.line"]._switch_timer(
+            project_id, task_id=task_id, name=name
+        )
+
+    @http.route("/project_timesheet_time_control/events", type="json", auth="user")
+    def events(self, events):
+        """Apply a batch of timer events recorded offline by a client."""
+        return request.env["hr.timesheet.time_control.event"]._ingest(events)
+
+    @http.route("/project_timesheet_time_control/export", type="http", auth="user")
+    def export(self, date_from, date_to, file_format="csv"):
+        """Stream the time controlled lines of a period as CSV or XLSX."""
+        if file_format not in EXPORT_MIMETYPES:
+            return request.not_found()
+        date_from, date_to = map(fields.Date.to_date, (date_from, date_to))
+        domain = [
+            ("date_time", "!=", False),
+            ("project_id", "!=", False),
+            ("date", ">=", date_from),
+            ("date", "<=", date_to),
+        ]
+        stream = request.env["account.analytic.line"]._time_control_export_stream(
+            domain, file_format
+        )
+        filename = f"timesheets_{date_from}_{date_to}.{file_format}"
+        return request.make_response(
+            stream,
+            headers=[
+                ("Content-Type", EXPORT_MIMETYPES[file_format]),
+                ("Content-Disposition", content_disposition(filename)),
+            ],
+        )
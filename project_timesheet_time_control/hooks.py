@@ -1,13 +1,109 @@
 # Copyright 2016-2017 Tecnativa - Pedro M. Baeza
 # License AGPL-3 - See http://www.gnu.org/licenses/agpl-3.0.html
 
+import logging
+import threading
+
+from .models.account_analytic_line import RUNNING_LINE_WHERE
+
+_logger = logging.getLogger(__name__)
+
+BACKFILL_CHUNK_SIZE = 50000
+
+
+def update_in_chunks(
+    env, name, query, args=(), chunk_size=BACKFILL_CHUNK_SIZE, auto_commit=False
+):
+    """Run an update over account_analytic_line in id ranges.
+
+    Install hooks and migrations do not commit chunks, so a failure rolls the
+    whole update back along with the module state. When run from a shell
+    with ``auto_commit``, each chunk is committed and its progress saved, so
+    running it again after an interruption resumes where it stopped.
+
+    :param str name: Unique name of the update, to save its progress.
+    :param str query: Update query with placeholders for the id range bounds,
+        followed by ``args``.
+    :param bool auto_commit: Commit after each chunk. Ignored in tests.
+    """
+    auto_commit = auto_commit and not getattr(
+        threading.current_thread(), "testing", False
+    )
+    params = env["ir.config_parameter"].sudo()
+    param = f"project_timesheet_time_control.{name}_last_id"
+    last_id = int(params.get_param(param, 0))
+    env.cr.execute("SELECT MAX(id) FROM account_analytic_line")
+    max_id = env.cr.fetchone()[0] or 0
+    while last_id < max_id:
+        next_id = min(last_id + chunk_size, max_id)
+        env.cr.execute(query, (last_id, next_id, *args))
+        last_id = next_id
+        if auto_commit:
+            params.set_param(param, last_id)
+            env.cr.commit()  # pylint: disable=invalid-commit
+        _logger.info("%s: processed lines up to id %d of %d", name, last_id, max_id)
+    params.set_param(param, False)
+
+
+def fill_time_control_state(cr):
+    """Register already running timers in the time control state table."""
+    cr.execute(
+        f"""INSERT INTO hr_timesheet_time_control_state
+            (line_id, user_id, employee_id, project_id, task_id, company_id,
+            date_time)
+        SELECT id, user_id, employee_id, project_id, task_id, company_id,
+            date_time
+        FROM account_analytic_line
+        WHERE {RUNNING_LINE_WHERE}
+        ON CONFLICT (line_id) DO NOTHING
+        """
+    )
+
+
+def create_date_time_end_column(cr):
+    """Create the stored end time column beforehand.
+
+    This way the ORM does not compute it line by line, and it is filled
+    with a few queries instead.
+    """
+    cr.execute(
+        """ALTER TABLE account_analytic_line
+        ADD COLUMN IF NOT EXISTS date_time_end timestamp
+        """
+    )
+
+
+def fill_date_time_end(env, auto_commit=False):
+    """Store the end time of lines measured in hours."""
+    update_in_chunks(
+        env,
+        "date_time_end",
+        """UPDATE account_analytic_line
+        SET date_time_end = date_time + unit_amount * interval '1 hour'
+        WHERE id > %s AND id <= %s
+            AND product_uom_id = %s
+            AND date_time IS NOT NULL
+            AND unit_amount != 0
+        """,
+        (env.ref("uom.product_uom_hour").id,),
+        auto_commit=auto_commit,
+    )
+
+
+def pre_init_hook(env):
+    create_date_time_end_column(env.cr)
+
 
 def post_init_hook(env):
     """Put the date with 00:00:00 as the date_time for the line."""
-    env.cr.execute(
+    update_in_chunks(
+        env,
+        "date_time",
         """UPDATE account_analytic_line
-        SET date_time = to_timestamp(date || ' 00:00:00',
-                                     'YYYY/MM/DD HH24:MI:SS')
-        WHERE date(date_time) != date
-        """
+        SET date_time = date::timestamp
+        WHERE id > %s AND id <= %s AND date(date_time) != date
+        """,
     )
+    fill_date_time_end(env)
+    fill_time_control_state(env.cr)
+    env["hr.timesheet.time_control.summary"]._refresh_all()
@@ -0,0 +1,7 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo.addons.project_timesheet_time_control.hooks import fill_time_control_state
+
+
+def migrate(cr, version):
+    fill_time_control_state(cr)
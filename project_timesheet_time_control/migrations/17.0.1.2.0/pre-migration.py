@@ -0,0 +1,13 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import SUPERUSER_ID, api
+
+from odoo.addons.project_timesheet_time_control.hooks import (
+    create_date_time_end_column,
+    fill_date_time_end,
+)
+
+
+def migrate(cr, version):
+    create_date_time_end_column(cr)
+    fill_date_time_end(api.Environment(cr, SUPERUSER_ID, {}))
@@ -1,6 +1,14 @@
 # License AGPL-3 - See http://www.gnu.org/licenses/agpl-3.0.html
 
 from . import account_analytic_line
+from . import hr_timesheet_time_control_event
+from . import hr_timesheet_time_control_lock
 from . import hr_timesheet_time_control_mixin
+from . import hr_timesheet_time_control_recent
+from . import hr_timesheet_time_control_running
+from . import hr_timesheet_time_control_state
+from . import hr_timesheet_time_control_summary
+from . import ir_websocket
 from . import project_project
 from . import project_task
+from . import res_company
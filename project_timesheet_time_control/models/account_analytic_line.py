@@ -3,12 +3,45 @@
 # Copyright 2016-2018 Tecnativa - Pedro M. Baeza
 # License AGPL-3 - See http://www.gnu.org/licenses/agpl-3.0.html
 
-from datetime import datetime
+import csv
+import io
+import itertools
+import json
+import logging
+import tempfile
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
 
+import pytz
+import xlsxwriter
 from dateutil.relativedelta import relativedelta
 
 from odoo import _, api, fields, models
-from odoo.exceptions import UserError
+from odoo.exceptions import UserError, ValidationError
+from odoo.osv import expression
+from odoo.tools import SQL, sql
+
+_logger = logging.getLogger(__name__)
+
+# Lines with a start time and no duration yet are running timers
+RUNNING_LINE_WHERE = (
+    "date_time IS NOT NULL AND unit_amount = 0 AND project_id IS NOT NULL"
+)
+# Timesheet lines with a valid time range, open-ended for running timers
+TIME_RANGE_WHERE = (
+    "date_time IS NOT NULL AND project_id IS NOT NULL AND "
+    "(date_time_end >= date_time OR (date_time_end IS NULL AND unit_amount = 0))"
+)
+# Time range of a line. Inverted bounds, as in corrections with a negative
+# duration, give an open-ended range instead of failing, whatever the order
+# in which conditions are evaluated
+TIME_RANGE = (
+    "tsrange(date_time, CASE WHEN date_time_end >= date_time THEN date_time_end END)"
+)
+
+# Size of the blocks in which finished export files are streamed
+EXPORT_BLOCK_SIZE = 64 * 1024
 
 
 class AccountAnalyticLine(models.Model):
@@ -22,6 +55,8 @@ class AccountAnalyticLine(models.Model):
         string="End Time",
         compute="_compute_date_time_end",
         inverse="_inverse_date_time_end",
+        store=True,
+        readonly=False,
     )
     show_time_control = fields.Selection(
         selection=[("resume", "Resume"), ("stop", "Stop")],
@@ -29,6 +64,47 @@ class AccountAnalyticLine(models.Model):
         help="Indicate which time control button to show, if any.",
     )
 
+    def init(self):
+        """Index running timers, so finding them does not scan the history."""
+        res = super().init()
+        sql.create_index(
+            self.env.cr,
+            f"{self._table}_employee_id_date_time_index",
+            self._table,
+            ["employee_id", "date_time"],
+        )
+        # Latest line of an employee in a task, or in a project without task
+        sql.create_index(
+            self.env.cr,
+            f"{self._table}_employee_task_date_time_index",
+            self._table,
+            ["employee_id", "task_id", "date_time DESC", "id DESC"],
+        )
+        sql.create_index(
+            self.env.cr,
+            f"{self._table}_employee_project_date_time_index",
+            self._table,
+            ["employee_id", "project_id", "date_time DESC", "id DESC"],
+            where="task_id IS NULL",
+        )
+        sql.create_index(
+            self.env.cr,
+            f"{self._table}_time_range_index",
+            self._table,
+            [TIME_RANGE],
+            method="gist",
+            where=TIME_RANGE_WHERE,
+        )
+        for column in ("employee_id", "user_id"):
+            sql.create_index(
+                self.env.cr,
+                f"{self._table}_running_{column}_index",
+                self._table,
+                [column],
+                where=RUNNING_LINE_WHERE,
+            )
+        return res
+
     @api.depends("date_time", "unit_amount", "product_uom_id")
     def _compute_date_time_end(self):
         hour_uom = self.env.ref("uom.product_uom_hour")
@@ -42,7 +118,7 @@ class AccountAnalyticLine(models.Model):
                     hours=record.unit_amount
                 )
             else:
-                record.date_time_end = record.date_time_end
+                record.date_time_end = False
 
     def _inverse_date_time_end(self):
         hour_uom = self.env.ref("uom.product_uom_hour")
@@ -52,9 +128,402 @@ class AccountAnalyticLine(models.Model):
                     record.date_time_end - record.date_time
                 ).seconds / 3600
 
+    @api.model
+    def _overlapping_line_ids(self, employees, date_from, date_to):
+        """Ids of lines of these employees that overlap in a period.
+
+        Intervals of each employee are sorted by start and swept once: a line
+        overlaps if it starts before any previous line ends, or ends after
+        the next one starts. Running timers have no end yet. Durations are
+        rounded, so intervals may touch within one rounding step.
+        """
+        digits = self._fields["unit_amount"].get_digits(self.env)
+        tolerance = timedelta(hours=10 ** -digits[1] if digits else 0)
+        self.flush_model(
+            ["date_time", "unit_amount", "employee_id", "project_id", "product_uom_id"]
+        )
+        self.env.cr.execute(
+            SQL(
+                """
+                WITH line AS (
+                    SELECT id, employee_id, date_time AS start, CASE
+                        WHEN unit_amount = 0 THEN 'infinity'::timestamp
+                        ELSE date_time + unit_amount * interval '1 hour'
+                        END AS stop
+                    FROM account_analytic_line
+                    WHERE employee_id = ANY(%s)
+                        AND date_time < %s
+                        AND project_id IS NOT NULL
+                        AND product_uom_id = %s
+                ), swept AS (
+                    SELECT id, start, stop,
+                        MAX(stop) OVER (
+                            PARTITION BY employee_id ORDER BY start, id
+                            ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                        ) AS previous_stop,
+                        LEAD(start) OVER (
+                            PARTITION BY employee_id ORDER BY start, id
+                        ) AS next_start
+                    FROM line
+                    WHERE stop > %s
+                )
+                SELECT id FROM swept
+                WHERE start < previous_stop - %s OR stop - %s > next_start
+                """,
+                employees.ids,
+                date_to,
+                self.env.ref("uom.product_uom_hour").id,
+                date_from,
+                tolerance,
+                tolerance,
+            )
+        )
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _get_overlapping_lines(self, employees, date_from, date_to):
+        """Timesheet lines of these employees overlapping in a period.
+
+        :param employees: ``hr.employee`` recordset to check.
+        :param datetime date_from: Only lines active after it are checked.
+        :param datetime date_to: Only lines active before it are checked.
+        """
+        return self.browse(self._overlapping_line_ids(employees, date_from, date_to))
+
+    @api.constrains("date_time", "unit_amount", "employee_id")
+    def _check_time_overlap(self):
+        """Forbid overlapping lines when the company requires it."""
+        lines = self.filtered(
+            lambda line: line.company_id.timesheet_prevent_overlap
+            and line.employee_id
+            and line.project_id
+            and line.date_time
+        )
+        if not lines:
+            return
+        # One query checks the whole batch, however many employees it has
+        date_to = max(
+            line.date_time_end
+            if line.unit_amount and line.date_time_end
+            else datetime.max
+            for line in lines
+        )
+        overlapping = lines & self._get_overlapping_lines(
+            lines.employee_id, min(lines.mapped("date_time")), date_to
+        )
+        if overlapping:
+            raise ValidationError(
+                _(
+                    "These timesheet lines overlap other lines of the same "
+                    "employee:\n%s"
+                )
+                % "\n".join(
+                    f"{line.employee_id.name}: {line.date_time} {line.name}"
+                    for line in overlapping
+                )
+            )
+
+    @api.model
+    def _get_active_lines(self, date_from, date_to=None, projects=None, employees=None):
+        """Timesheet lines being worked on in a time window or at an instant.
+
+        Running timers are considered active until now and beyond.
+
+        :param datetime date_from: Start of the window, or the instant.
+        :param datetime date_to: End of the window. Omit it to get the lines
+            active at ``date_from``.
+        :param projects: Optional ``project.project`` recordset to filter on.
+        :param employees: Optional ``hr.employee`` recordset to filter on.
+        """
+        self.flush_model(
+            [
+                "date_time",
+                "date_time_end",
+                "unit_amount",
+                "project_id",
+                "employee_id",
+            ]
+        )
+        conditions = [SQL(TIME_RANGE_WHERE)]
+        if date_to:
+            conditions.append(
+                SQL("%s && tsrange(%s, %s, '[]')", SQL(TIME_RANGE), date_from, date_to)
+            )
+        else:
+            conditions.append(SQL("%s @> %s::timestamp", SQL(TIME_RANGE), date_from))
+        if projects is not None:
+            conditions.append(SQL("project_id = ANY(%s)", projects.ids))
+        if employees is not None:
+            conditions.append(SQL("employee_id = ANY(%s)", employees.ids))
+        self.env.cr.execute(
+            SQL(
+                "SELECT id FROM %s WHERE %s ORDER BY date_time",
+                SQL.identifier(self._table),
+                SQL(" AND ").join(conditions),
+            )
+        )
+        return self.browse(row[0] for row in self.env.cr.fetchall())
+
+    @api.model
+    def _get_active_employees(self, date_from, date_to=None, projects=None):
+        """Employees clocked in some projects in a time window or instant."""
+        return self._get_active_lines(date_from, date_to, projects).employee_id
+
+    @api.model
+    def _time_clock_lookups(self):
+        """Dicts to resolve imported employees, projects and tasks by name.
+
+        Each name maps to the set of ids having it, so rows with names of
+        several records can be reported as ambiguous.
+        """
+        employees = defaultdict(set)
+        for employee in self.env["hr.employee"].search_read([], ["name", "barcode"]):
+            employees[employee["name"]].add(employee["id"])
+            if employee["barcode"]:
+                employees[employee["barcode"]].add(employee["id"])
+        projects = defaultdict(set)
+        for project in self.env["project.project"].search_read(
+            [("allow_timesheets", "=", True)], ["name"]
+        ):
+            projects[project["name"]].add(project["id"])
+        tasks = defaultdict(set)
+        for task in self.env["project.task"].search_read(
+            [("project_id", "in", list(set().union(*projects.values())))],
+            ["name", "project_id"],
+        ):
+            tasks[task["project_id"][0], task["name"]].add(task["id"])
+        return {"employee": employees, "project": projects, "task": tasks}
+
+    @api.model
+    def _time_clock_lookup(self, lookups, kind, key):
+        """Id of the only record of a kind matching an imported name.
+
+        :raise KeyError: If no record matches.
+        :raise ValueError: If several records match.
+        """
+        ids = lookups[kind].get(key)
+        if not ids:
+            raise KeyError(key)
+        if len(ids) > 1:
+            raise ValueError(
+                _("%(kind)s %(key)r is ambiguous, %(count)d records match it")
+                % {"kind": kind, "key": key, "count": len(ids)}
+            )
+        return next(iter(ids))
+
+    @api.model
+    def _time_clock_rows(self, file, file_format):
+        """Yield rows of a binary CSV or JSON Lines file, one at a time."""
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        if file_format == "csv":
+            yield from csv.DictReader(text)
+        else:
+            for line in text:
+                if line.strip():
+                    yield json.loads(line)
+
+    @api.model
+    def _prepare_time_clock_vals(self, rows, lookups):
+        """Yield create values for time clock rows.
+
+        Rows have ``employee`` (name or badge), ``project`` and ``task``
+        names, ``date_time`` and ``date_time_end`` in UTC and ``name``.
+        Rows without end start a running timer.
+        """
+        tz = pytz.timezone(self.env.context.get("tz") or self.env.user.tz or "UTC")
+        for number, row in enumerate(rows, start=1):
+            try:
+                employee_id = self._time_clock_lookup(
+                    lookups, "employee", row["employee"]
+                )
+                project_id = self._time_clock_lookup(lookups, "project", row["project"])
+                task_id = (
+                    self._time_clock_lookup(lookups, "task", (project_id, row["task"]))
+                    if row.get("task")
+                    else False
+                )
+                start = fields.Datetime.to_datetime(row["date_time"] or None)
+                end = fields.Datetime.to_datetime(row.get("date_time_end") or None)
+                if not start:
+                    raise ValueError(_("missing start time"))
+                if end and end < start:
+                    raise ValueError(_("end time is before start time"))
+            except (KeyError, ValueError) as error:
+                raise UserError(
+                    _("Cannot import time clock row %(number)d: %(error)s")
+                    % {"number": number, "error": error}
+                ) from error
+            yield {
+                "employee_id": employee_id,
+                "project_id": project_id,
+                "task_id": task_id,
+                "name": row.get("name") or "/",
+                "date_time": start,
+                "date": pytz.utc.localize(start).astimezone(tz).date(),
+                "unit_amount": self._duration(start, end) if end else 0,
+            }
+
+    @api.model
+    def _import_time_clock(self, file, file_format="csv", batch_size=1000):
+        """Import time clock start/end rows as timesheet lines.
+
+        The file is streamed and lines are created in fixed-size batches,
+        clearing the cache after each one, so memory does not grow with the
+        file size. Usable from a shell::
+
+            with open("export.csv", "rb") as file:
+                env["account.analytic.line"]._import_time_clock(file)
+
+        :param file: Binary file object with CSV or JSON Lines content.
+        :param str file_format: Either ``csv`` or ``jsonl``.
+        :return: Amount of imported lines.
+        """
+        vals_iter = self._prepare_time_clock_vals(
+            self._time_clock_rows(file, file_format), self._time_clock_lookups()
+        )
+        importer = self.with_context(time_control_date_given=True)
+        imported = 0
+        while True:
+            batch = list(itertools.islice(vals_iter, batch_size))
+            if not batch:
+                break
+            importer.create(batch)
+            imported += len(batch)
+            self.env.flush_all()
+            self.env.invalidate_all()
+            _logger.info("Imported %d time clock lines", imported)
+        return imported
+
+    @api.model
+    def _time_control_export_header(self):
+        return [
+            _("Employee"),
+            _("Project"),
+            _("Task"),
+            _("Description"),
+            _("Date"),
+            _("Start Time"),
+            _("End Time"),
+            _("Duration"),
+        ]
+
+    @api.model
+    def _time_control_export_rows(self, domain, batch_size=5000):
+        """Yield batches of export rows of the lines matching a domain.
+
+        Lines are paginated by id, so each batch is an indexed range scan and
+        nothing accumulates in the cache. End times missing in the database
+        are computed in SQL, and times are given in the user's timezone.
+        """
+        hour_uom = self.env.ref("uom.product_uom_hour")
+        tz = self.env.user.tz or "UTC"
+        lang = self.env.lang or "en_US"
+        self.flush_model()
+        last_id = 0
+        while True:
+            ids = list(
+                self._search(
+                    expression.AND([domain, [("id", ">", last_id)]]),
+                    order="id",
+                    limit=batch_size,
+                )
+            )
+            if not ids:
+                break
+            self.env.cr.execute(
+                SQL(
+                    """
+                    SELECT employee.name,
+                        COALESCE(project.name->>%s, project.name->>'en_US'),
+                        task.name, aal.name, aal.date,
+                        aal.date_time AT TIME ZONE 'UTC' AT TIME ZONE %s,
+                        COALESCE(
+                            aal.date_time_end,
+                            CASE WHEN aal.product_uom_id = %s AND aal.unit_amount > 0
+                            THEN aal.date_time + aal.unit_amount * interval '1 hour'
+                            END
+                        ) AT TIME ZONE 'UTC' AT TIME ZONE %s,
+                        aal.unit_amount
+                    FROM account_analytic_line aal
+                    LEFT JOIN hr_employee employee ON employee.id = aal.employee_id
+                    LEFT JOIN project_project project ON project.id = aal.project_id
+                    LEFT JOIN project_task task ON task.id = aal.task_id
+                    WHERE aal.id = ANY(%s)
+                    ORDER BY aal.id
+                    """,
+                    lang,
+                    tz,
+                    hour_uom.id,
+                    tz,
+                    ids,
+                )
+            )
+            yield self.env.cr.fetchall()
+            last_id = ids[-1]
+
+    @api.model
+    def _time_control_export_chunks(self, domain, file_format="csv", batch_size=5000):
+        """Yield a CSV or XLSX export of time controlled lines piece by piece.
+
+        CSV is yielded after each batch. XLSX is built in constant memory
+        mode in a temporary file, which is yielded in blocks once finished.
+        """
+        header = self._time_control_export_header()
+        batches = self._time_control_export_rows(domain, batch_size)
+        if file_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(header)
+            for batch in batches:
+                writer.writerows(batch)
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue().encode()
+            return
+        with tempfile.TemporaryFile() as file:
+            workbook = xlsxwriter.Workbook(
+                file,
+                {
+                    "constant_memory": True,
+                    "default_date_format": "yyyy-mm-dd hh:mm:ss",
+                },
+            )
+            sheet = workbook.add_worksheet()
+            sheet.write_row(0, 0, header)
+            row_index = 1
+            for batch in batches:
+                for row in batch:
+                    sheet.write_row(row_index, 0, row)
+                    row_index += 1
+            workbook.close()
+            file.seek(0)
+            while chunk := file.read(EXPORT_BLOCK_SIZE):
+                yield chunk
+
+    @api.model
+    def _time_control_export_stream(self, domain, file_format="csv"):
+        """Export generator usable as an HTTP response body.
+
+        Responses are streamed after the request cursor is closed, so the
+        export reads with its own cursor.
+        """
+        registry, uid, context = self.env.registry, self.env.uid, self.env.context
+
+        def stream():
+            with registry.cursor() as cr:
+                env = api.Environment(cr, uid, context)
+                yield from env[self._name]._time_control_export_chunks(
+                    domain, file_format
+                )
+
+        return stream()
+
     @api.model
     def _eval_date(self, vals):
-        if vals.get("date_time"):
+        if vals.get("date_time") and not (
+            vals.get("date") and self.env.context.get("time_control_date_given")
+        ):
             return dict(vals, date=self._convert_datetime_to_date(vals["date_time"]))
         return vals
 
@@ -73,6 +542,36 @@ class AccountAnalyticLine(models.Model):
             ("unit_amount", "=", 0),
         ]
 
+    @api.model
+    def _running_timers(self, employees=None, users=None):
+        """Find running timesheet lines of some employees or users.
+
+        :param employees: ``hr.employee`` recordset whose timers are wanted.
+        :param users: ``res.users`` recordset whose timers are wanted, used
+            when no employees are given. Defaults to the current user.
+        :return: ``account.analytic.line`` recordset of running timers.
+        """
+        if employees is not None:
+            column, ids = "employee_id", employees.ids
+        else:
+            column, ids = "user_id", (users or self.env.user).ids
+        if not ids:
+            return self.browse()
+        self.flush_model(
+            ["date_time", "unit_amount", "project_id", "employee_id", "user_id"]
+        )
+        # Raw query with the exact index predicate, so it is always an index hit
+        self.env.cr.execute(
+            SQL(
+                "SELECT id FROM %s WHERE %s = ANY(%s) AND %s ORDER BY id",
+                SQL.identifier(self._table),
+                SQL.identifier(column),
+                ids,
+                SQL(RUNNING_LINE_WHERE),
+            )
+        )
+        return self.browse(row[0] for row in self.env.cr.fetchall())
+
     @api.model
     def _duration(self, start, end):
         """Compute float duration between start and end."""
@@ -84,20 +583,88 @@ class AccountAnalyticLine(models.Model):
     @api.depends("employee_id", "unit_amount")
     def _compute_show_time_control(self):
         """Decide when to show time controls."""
+        employees = self.env.user.employee_ids
         for one in self:
-            if one.employee_id not in self.env.user.employee_ids:
+            if one.employee_id not in employees:
                 one.show_time_control = False
             elif one.unit_amount or not one.date_time:
                 one.show_time_control = "resume"
             else:
                 one.show_time_control = "stop"
 
+    @api.model
+    def _time_control_state_fields(self):
+        """Fields whose change may start, stop or move a running timer."""
+        return {
+            "date_time",
+            "unit_amount",
+            "project_id",
+            "task_id",
+            "employee_id",
+            "user_id",
+        }
+
+    def _sync_time_control_state(self):
+        return self.env["hr.timesheet.time_control.state"].sudo()._sync_lines(self)
+
+    @api.model
+    @api.model
+    def _time_control_recent_fields(self):
+        """Fields making up the activity recorded in recent activities."""
+        return {"employee_id", "project_id", "task_id", "name"}
+
+    def _time_control_summary_fields(self):
+        """Fields whose change alters the daily time control summary."""
+        return self._time_control_state_fields() | {
+            "date",
+            "date_time_end",
+            "product_uom_id",
+            "company_id",
+        }
+
+    def _time_control_summary_keys(self):
+        return {(line.employee_id.id, line.date) for line in self}
+
+    def _refresh_time_control_summary(self, keys):
+        self.env["hr.timesheet.time_control.summary"].sudo()._refresh(keys)
+
     @api.model_create_multi
     def create(self, vals_list):
-        return super().create(list(map(self._eval_date, vals_list)))
+        res = super().create(list(map(self._eval_date, vals_list)))
+        res._sync_time_control_state()
+        self.env["hr.timesheet.time_control.recent"].sudo()._register_lines(res)
+        res._refresh_time_control_summary(res._time_control_summary_keys())
+        return res
 
     def write(self, vals):
-        return super().write(self._eval_date(vals))
+        if self.env.context.get("time_control_defer_sync"):
+            # The caller syncs states and the summary once for all its writes
+            return super().write(self._eval_date(vals))
+        refresh_summary = self._time_control_summary_fields().intersection(vals)
+        # Lines may move away from the days they are summarized in
+        keys = self._time_control_summary_keys() if refresh_summary else set()
+        res = super().write(self._eval_date(vals))
+        if self._time_control_state_fields().intersection(vals):
+            self._sync_time_control_state()
+        if self._time_control_recent_fields().intersection(vals):
+            # Recent activities would otherwise offer the former activity
+            recent_model = self.env["hr.timesheet.time_control.recent"].sudo()
+            recent_model._forget_lines(self)
+            recent_model._register_lines(self)
+        if refresh_summary:
+            self._refresh_time_control_summary(keys | self._time_control_summary_keys())
+        return res
+
+    def unlink(self):
+        # Drop states through the ORM so time control buttons get refreshed
+        self.env["hr.timesheet.time_control.state"].sudo().search(
+            [("line_id", "in", self.ids)]
+        ).unlink()
+        self.env["hr.timesheet.time_control.recent"].sudo()._forget_lines(self)
+        keys = self._time_control_summary_keys()
+        res = super().unlink()
+        self._refresh_time_control_summary(keys)
+        return res
 
     def button_resume_work(self):
         """Create a new record starting now, with a running timer."""
@@ -110,18 +677,136 @@ class AccountAnalyticLine(models.Model):
             "view_type": "form",
         }
 
+    @api.model
+    def _lock_timers(self, employees):
+        """Serialize timer changes of these employees with other transactions."""
+        self.env["hr.timesheet.time_control.lock"].sudo()._acquire(employees)
+
     def button_end_work(self):
         end = fields.Datetime.to_datetime(
             self.env.context.get("stop_dt", datetime.now())
         )
-        for line in self:
-            if line.unit_amount:
-                raise UserError(
-                    _(
-                        "Cannot stop timer %d because it is not running. "
-                        "Refresh the page and check again."
-                    )
-                    % line.id
+        self._lock_timers(self.employee_id)
+        not_running = self.filtered("unit_amount")
+        if not_running:
+            raise UserError(
+                _(
+                    "Cannot stop timer %d because it is not running. "
+                    "Refresh the page and check again."
                 )
-            line.unit_amount = line._duration(line.date_time, end)
+                % not_running[0].id
+            )
+        self._stop_timers(dict.fromkeys(self.ids, end))
         return True
+
+    def _stop_timers(self, ends):
+        """Stop running timers in bulk.
+
+        Lines sharing a duration are stopped with a single write, so other
+        modules see every stop in ``write()``. Timer states, their bus
+        notifications and the summary are refreshed once for all of them.
+
+        :param dict ends: Stop datetime for each line id.
+        """
+        ids_per_duration = defaultdict(list)
+        for line in self:
+            duration = line._duration(line.date_time, ends[line.id])
+            ids_per_duration[duration].append(line.id)
+        keys = self._time_control_summary_keys()
+        deferred = self.with_context(time_control_defer_sync=True)
+        for duration, ids in ids_per_duration.items():
+            deferred.browse(ids).write({"unit_amount": duration})
+        self._sync_time_control_state()
+        self._refresh_time_control_summary(keys | self._time_control_summary_keys())
+
+    @api.model
+    def _switch_timer(self, project_id, task_id=False, name=False):
+        """Stop the current user's running timer and start a new one.
+
+        This is the lightweight equivalent of ``hr.timesheet.switch``, meant
+        for clients that switch work without opening the wizard.
+
+        :return: Id and start time of the new running line.
+        """
+        if not (project_id or task_id):
+            raise UserError(_("Choose a project or a task to start the timer."))
+        # Like the switch wizard, check the timers of all the user's employees
+        employees = self.env.user.employee_ids
+        now = fields.Datetime.now()
+        self._lock_timers(employees)
+        running = self._running_timers(employees=employees)
+        if len(running) > 1:
+            raise UserError(
+                _(
+                    "%d running timers found. Cannot know which one to stop. "
+                    "Please stop them manually."
+                )
+                % len(running)
+            )
+        running._stop_timers(dict.fromkeys(running.ids, now))
+        if not project_id:
+            project_id = self.env["project.task"].browse(task_id).project_id.id
+        new = self.create(
+            {
+                "date_time": now,
+                "employee_id": self.env.user.employee_id.id or employees[:1].id,
+                "name": name,
+                "project_id": project_id,
+                "task_id": task_id,
+                "unit_amount": 0,
+            }
+        )
+        return {"id": new.id, "date_time": fields.Datetime.to_string(now)}
+
+    @api.model
+    def _cron_stop_idle_timers(self, chunk_size=1000):
+        """Stop running timers idle for longer than their company allows.
+
+        A timer is idle when neither its start nor its last heartbeat are
+        more recent than the company maximum timer duration. It is stopped
+        at its last heartbeat, or after that maximum duration if it never
+        got one.
+        """
+        auto_commit = not getattr(threading.current_thread(), "testing", False)
+        self.flush_model()
+        self.env["hr.timesheet.time_control.state"].flush_model()
+        last_id = 0
+        while True:
+            self.env.cr.execute(
+                SQL(
+                    """
+                    SELECT aal.id, CASE
+                        WHEN state.heartbeat > aal.date_time THEN state.heartbeat
+                        ELSE aal.date_time
+                            + company.timesheet_timer_max_duration
+                            * interval '1 hour'
+                        END
+                    FROM (
+                        SELECT id, date_time, company_id
+                        FROM account_analytic_line
+                        WHERE %s AND id > %s
+                    ) aal
+                    JOIN res_company company ON company.id = aal.company_id
+                    LEFT JOIN hr_timesheet_time_control_state state
+                        ON state.line_id = aal.id
+                    WHERE company.timesheet_timer_max_duration > 0
+                        AND GREATEST(aal.date_time, state.heartbeat)
+                            < (now() at time zone 'UTC')
+                            - company.timesheet_timer_max_duration
+                            * interval '1 hour'
+                    ORDER BY aal.id
+                    LIMIT %s
+                    """,
+                    SQL(RUNNING_LINE_WHERE),
+                    last_id,
+                    chunk_size,
+                )
+            )
+            ends = dict(self.env.cr.fetchall())
+            if not ends:
+                break
+            self.browse(ends)._stop_timers(ends)
+            _logger.info("Stopped %d idle timers", len(ends))
+            last_id = max(ends)
+            if auto_commit:
+                self.env.cr.commit()  # pylint: disable=invalid-commit
@@ -0,0 +1,186 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from collections import defaultdict
+
+from odoo import _, api, fields, models
+from odoo.exceptions import AccessError, UserError
+
+
+class HrTimesheetTimeControlEvent(models.Model):
+    _name = "hr.timesheet.time_control.event"
+    _description = "Timer event synchronized by a client"
+    _order = "date_time desc, id desc"
+    _sql_constraints = [
+        (
+            "employee_key_unique",
+            "UNIQUE(employee_id, key)",
+            "Timer events can only be applied once",
+        ),
+    ]
+
+    key = fields.Char(
+        required=True,
+        readonly=True,
+        help="Idempotency key generated by the client for this event, unique "
+        "per employee.",
+    )
+    event_type = fields.Selection(
+        selection=[("start", "Start"), ("stop", "Stop"), ("switch", "Switch")],
+        required=True,
+        readonly=True,
+    )
+    employee_id = fields.Many2one(
+        comodel_name="hr.employee",
+        required=True,
+        ondelete="cascade",
+        index=True,
+        readonly=True,
+    )
+    date_time = fields.Datetime(required=True, readonly=True)
+    line_id = fields.Many2one(
+        comodel_name="account.analytic.line",
+        ondelete="set null",
+        readonly=True,
+        help="Timesheet line started or stopped by this event.",
+    )
+
+    @api.model
+    def _event_employee(self, event):
+        """Employee an event applies to, defaulting to the current user's."""
+        own = self.env.user.employee_ids
+        if not event.get("employee_id"):
+            return own[:1]
+        employee = self.env["hr.employee"].browse(event["employee_id"])
+        if employee not in own and not self.user_has_groups(
+            "hr_timesheet.group_hr_timesheet_approver"
+        ):
+            raise AccessError(_("You cannot record timer events of other employees."))
+        return employee.exists()
+
+    @api.model
+    def _parse_events(self, events):
+        """Validate raw client events.
+
+        :return: List of ``(index, event, employee, date_time)`` tuples.
+        """
+        parsed = []
+        types = dict(self._fields["event_type"].selection)
+        for index, event in enumerate(events):
+            if not event.get("key") or event.get("type") not in types:
+                raise UserError(
+                    _("Timer event %d needs a key and a valid type.") % index
+                )
+            employee = self._event_employee(event)
+            if not employee:
+                raise UserError(_("Timer event %s has no employee.") % event["key"])
+            try:
+                date_time = fields.Datetime.to_datetime(event["date_time"])
+            except (KeyError, TypeError, ValueError) as error:
+                raise UserError(
+                    _("Timer event %s has no valid date and time.") % event["key"]
+                ) from error
+            if event["type"] != "stop" and not (
+                event.get("project_id") or event.get("task_id")
+            ):
+                raise UserError(
+                    _("Timer event %s needs a project or a task.") % event["key"]
+                )
+            parsed.append((index, event, employee, date_time))
+        return parsed
+
+    @api.model
+    def _ingest(self, events):
+        """Apply a batch of start, stop and switch events in one transaction.
+
+        Events are applied per employee in chronological order. Starting or
+        switching stops the employee's running timer, as only one may run.
+        Events whose key was already applied for the same employee are
+        skipped. Events not newer than the running timer they would stop are
+        not applied either, and reported as conflicts.
+
+        :param list events: Dicts with ``key``, ``type``, ``date_time`` and,
+            to start timers, ``project_id``, ``task_id`` and ``name``.
+        :return: One result dict per event, in the order they were given,
+            with its ``key``, ``status`` and ``line_id``.
+        """
+        parsed = self._parse_events(events)
+        employees = self.env["hr.employee"].union(
+            *(employee for _index, _event, employee, _dt in parsed)
+        )
+        keys = [event["key"] for _index, event, _employee, _dt in parsed]
+        applied = {
+            (event.employee_id, event.key): event
+            for event in self.sudo().search(
+                [("employee_id", "in", employees.ids), ("key", "in", keys)]
+            )
+        }
+        results = [None] * len(parsed)
+        events_per_employee = defaultdict(list)
+        for index, event, employee, date_time in parsed:
+            if (employee, event["key"]) in applied:
+                results[index] = {
+                    "key": event["key"],
+                    "status": "duplicate",
+                    "line_id": applied[employee, event["key"]].line_id.id,
+                }
+                continue
+            # Keys repeated inside the batch are only applied once as well
+            applied[employee, event["key"]] = self.browse()
+            events_per_employee[employee].append((date_time, index, event))
+        lines = self.env["account.analytic.line"]
+        lines._lock_timers(self.env["hr.employee"].union(*events_per_employee))
+        to_create = []
+        for employee, employee_events in events_per_employee.items():
+            running = lines._running_timers(employees=employee)
+            for date_time, index, event in sorted(
+                employee_events, key=lambda item: item[:2]
+            ):
+                # Stopping a timer at its start would leave it running
+                if any(timer.date_time >= date_time for timer in running):
+                    results[index] = {
+                        "key": event["key"],
+                        "status": "conflict",
+                        "line_id": running[:1].id,
+                    }
+                    continue
+                line = running
+                if running:
+                    running._stop_timers(dict.fromkeys(running.ids, date_time))
+                    running = lines
+                if event["type"] != "stop":
+                    running = line = self._start_timer(employee, date_time, event)
+                status = "applied" if line else "ignored"
+                results[index] = {
+                    "key": event["key"],
+                    "status": status,
+                    "line_id": line[:1].id,
+                }
+                to_create.append(
+                    {
+                        "key": event["key"],
+                        "event_type": event["type"],
+                        "employee_id": employee.id,
+                        "date_time": date_time,
+                        "line_id": line[:1].id,
+                    }
+                )
+        self.sudo().create(to_create)
+        return results
+
+    @api.model
+    def _start_timer(self, employee, date_time, event):
+        """Create the running line requested by a start or switch event."""
+        lines = self.env["account.analytic.line"]
+        project_id = event.get("project_id")
+        if not project_id:
+            project_id = self.env["project.task"].browse(event["task_id"]).project_id.id
+        return lines.create(
+            {
+                "date_time": date_time,
+                "employee_id": employee.id,
+                "name": event.get("name", False),
+                "project_id": project_id,
+                "task_id": event.get("task_id", False),
+                "unit_amount": 0,
+            }
+        )
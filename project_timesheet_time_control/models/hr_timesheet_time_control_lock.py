@@ -0,0 +1,45 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+
+class HrTimesheetTimeControlLock(models.Model):
+    _name = "hr.timesheet.time_control.lock"
+    _description = "Serialize timer changes per employee"
+    _log_access = False
+    _sql_constraints = [
+        ("employee_unique", "UNIQUE(employee_id)", "Employee lock must be unique"),
+    ]
+
+    employee_id = fields.Many2one(
+        comodel_name="hr.employee",
+        required=True,
+        ondelete="cascade",
+        readonly=True,
+    )
+
+    @api.model
+    def _acquire(self, employees):
+        """Lock timer changes of some employees until the transaction ends.
+
+        Each employee gets a row that is upserted here. Concurrent
+        transactions changing timers of the same employee wait for each
+        other, and the one that waited then fails with a serialization error,
+        so it is retried with a snapshot that includes the other's timers.
+        Rows are locked in id order to avoid deadlocks.
+        """
+        if not employees:
+            return
+        self.env.cr.execute(
+            SQL(
+                """
+                INSERT INTO %s (employee_id)
+                SELECT unnest(%s::int[]) ORDER BY 1
+                ON CONFLICT (employee_id)
+                DO UPDATE SET employee_id = EXCLUDED.employee_id
+                """,
+                SQL.identifier(self._table),
+                sorted(employees.ids),
+            )
+        )
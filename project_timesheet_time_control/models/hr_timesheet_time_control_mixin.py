@@ -1,6 +1,8 @@
 # Copyright 2019 Tecnativa - Jairo Llopis
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+from collections import Counter
+
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
 
@@ -27,18 +29,29 @@ class HrTimesheetTimeControlMixin(models.AbstractModel):
             (self._relation_with_timesheet_line(), "in", self.ids),
         ]
 
+    def _timesheet_running_lines(self):
+        """Running timesheet lines of the current user related to these records."""
+        related_field = self._relation_with_timesheet_line()
+        record_ids = set(self.ids)
+        return (
+            self.env["account.analytic.line"]
+            ._running_timers()
+            .filtered(
+                lambda line: line[related_field].id in record_ids
+                and line.project_id.allow_timesheets
+            )
+        )
+
+    @api.depends_context("uid")
     def _compute_show_time_control(self):
         """Decide which time control button to show, if any."""
         related_field = self._relation_with_timesheet_line()
-        grouped = self.env["account.analytic.line"].read_group(
-            domain=self._timesheet_running_domain(),
-            fields=["id"],
-            groupby=[related_field],
+        states = (
+            self.env["hr.timesheet.time_control.state"]
+            .sudo()
+            .search([("user_id", "=", self.env.uid), (related_field, "in", self.ids)])
         )
-        lines_per_record = {
-            group[related_field][0]: group["%s_count" % related_field]
-            for group in grouped
-        }
+        lines_per_record = Counter(state[related_field].id for state in states)
         button_per_lines = {0: "start", 1: "stop"}
         for record in self:
             record.show_time_control = button_per_lines.get(
@@ -60,9 +73,7 @@ class HrTimesheetTimeControlMixin(models.AbstractModel):
         }
 
     def button_end_work(self):
-        running_lines = self.env["account.analytic.line"].search(
-            self._timesheet_running_domain(),
-        )
+        running_lines = self._timesheet_running_lines()
         if not running_lines:
             model = self.env["ir.model"].search([("model", "=", self._name)])
             message = _(
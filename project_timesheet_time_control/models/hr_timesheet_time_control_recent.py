@@ -0,0 +1,107 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models
+
+
+class HrTimesheetTimeControlRecent(models.Model):
+    _name = "hr.timesheet.time_control.recent"
+    _description = "Activity recently timed by an employee"
+    _order = "date_time desc, id desc"
+    _log_access = False
+
+    # Amount of recent activities kept per employee
+    _mru_size = 20
+
+    employee_id = fields.Many2one(
+        comodel_name="hr.employee",
+        required=True,
+        ondelete="cascade",
+        index=True,
+        readonly=True,
+    )
+    project_id = fields.Many2one(
+        comodel_name="project.project", ondelete="cascade", readonly=True
+    )
+    task_id = fields.Many2one(
+        comodel_name="project.task", ondelete="cascade", readonly=True
+    )
+    name = fields.Char(string="Description", readonly=True)
+    line_id = fields.Many2one(
+        comodel_name="account.analytic.line",
+        string="Last line",
+        required=True,
+        ondelete="cascade",
+        readonly=True,
+    )
+    date_time = fields.Datetime(string="Last Start", readonly=True)
+
+    @api.depends("project_id", "task_id", "name")
+    def _compute_display_name(self):
+        for recent in self:
+            recent.display_name = " / ".join(
+                part
+                for part in (
+                    recent.project_id.display_name,
+                    recent.task_id.name,
+                    recent.name,
+                )
+                if part
+            )
+
+    @api.model
+    def _register_lines(self, lines):
+        """Move the activities of these lines to the top of their employees' lists.
+
+        An activity is a project, task and description combination.
+        """
+        lines = lines.filtered(
+            lambda line: line.employee_id and line.project_id and line.date_time
+        )
+        if not lines:
+            return
+        recents = self.search([("employee_id", "in", lines.employee_id.ids)])
+        recent_per_key = {recent._activity_key(): recent for recent in recents}
+        for line in lines.sorted("date_time"):
+            key = (line.employee_id, line.project_id, line.task_id, line.name)
+            vals = {"line_id": line.id, "date_time": line.date_time}
+            recent = recent_per_key.get(key)
+            if not recent:
+                recent_per_key[key] = self.create(
+                    dict(
+                        vals,
+                        employee_id=line.employee_id.id,
+                        project_id=line.project_id.id,
+                        task_id=line.task_id.id,
+                        name=line.name,
+                    )
+                )
+            elif recent.date_time <= line.date_time:
+                recent.write(vals)
+        self._trim(lines.employee_id)
+
+    @api.model
+    def _forget_lines(self, lines):
+        """Drop the activities last timed by these lines."""
+        self.search([("line_id", "in", lines.ids)]).unlink()
+
+    def _activity_key(self):
+        return (self.employee_id, self.project_id, self.task_id, self.name)
+
+    @api.model
+    def _trim(self, employees):
+        """Forget the oldest activities beyond the size of the lists."""
+        self.flush_model()
+        self.env.cr.execute(
+            """
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY employee_id ORDER BY date_time DESC, id DESC
+                ) AS position
+                FROM hr_timesheet_time_control_recent
+                WHERE employee_id = ANY(%s)
+            ) ranked
+            WHERE position > %s
+            """,
+            (employees.ids, self._mru_size),
+        )
+        self.browse(row[0] for row in self.env.cr.fetchall()).unlink()
@@ -0,0 +1,109 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models, tools
+from odoo.tools import SQL
+
+from .account_analytic_line import RUNNING_LINE_WHERE
+
+# Bus channel name, per company, of managers following running timers
+RUNNING_CHANNEL = "time_control_running"
+
+
+class HrTimesheetTimeControlRunning(models.Model):
+    _name = "hr.timesheet.time_control.running"
+    _description = "Running timers of the company"
+    _auto = False
+    _order = "date_time"
+
+    line_id = fields.Many2one(
+        comodel_name="account.analytic.line", string="Timesheet line", readonly=True
+    )
+    employee_id = fields.Many2one(comodel_name="hr.employee", readonly=True)
+    department_id = fields.Many2one(comodel_name="hr.department", readonly=True)
+    user_id = fields.Many2one(comodel_name="res.users", readonly=True)
+    project_id = fields.Many2one(comodel_name="project.project", readonly=True)
+    task_id = fields.Many2one(comodel_name="project.task", readonly=True)
+    company_id = fields.Many2one(comodel_name="res.company", readonly=True)
+    name = fields.Char(string="Description", readonly=True)
+    date_time = fields.Datetime(string="Start Time", readonly=True)
+    elapsed_hours = fields.Float(
+        string="Elapsed",
+        readonly=True,
+        help="Time since the timer started, when the list was loaded.",
+    )
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        # Filter lines with the exact running timers index predicate
+        self.env.cr.execute(
+            SQL(
+                """
+                CREATE OR REPLACE VIEW %s AS (
+                    SELECT aal.id, aal.id AS line_id, aal.employee_id,
+                        employee.department_id, aal.user_id, aal.project_id,
+                        aal.task_id, aal.company_id, aal.name, aal.date_time,
+                        EXTRACT(
+                            EPOCH FROM (now() AT TIME ZONE 'UTC') - aal.date_time
+                        )::float / 3600 AS elapsed_hours
+                    FROM (
+                        SELECT * FROM account_analytic_line WHERE %s
+                    ) aal
+                    JOIN hr_employee employee ON employee.id = aal.employee_id
+                )
+                """,
+                SQL.identifier(self._table),
+                SQL(RUNNING_LINE_WHERE),
+            )
+        )
+
+    @api.model
+    def _overview(self, employees=None, departments=None):
+        """Running timers of some employees or departments in a single query.
+
+        :param employees: ``hr.employee`` recordset to filter by.
+        :param departments: ``hr.department`` recordset to filter by,
+            including their child departments.
+        :return: List of dicts with ids, names, start and elapsed hours of
+            the running timers, oldest first.
+        """
+        self.check_access_rights("read")
+        self.env["account.analytic.line"].flush_model()
+        self.env["hr.employee"].flush_model(["name", "department_id"])
+        conditions = [
+            SQL("running.company_id = ANY(%s)", self.env.companies.ids),
+        ]
+        if employees is not None:
+            conditions.append(SQL("running.employee_id = ANY(%s)", employees.ids))
+        if departments is not None:
+            conditions.append(
+                SQL(
+                    "running.department_id = ANY(%s)",
+                    self.env["hr.department"]
+                    .search([("id", "child_of", departments.ids)])
+                    .ids,
+                )
+            )
+        lang = self.env.lang or "en_US"
+        self.env.cr.execute(
+            SQL(
+                """
+                SELECT running.line_id, running.employee_id,
+                    employee.name AS employee_name, running.department_id,
+                    running.project_id,
+                    COALESCE(project.name->>%s, project.name->>'en_US')
+                        AS project_name,
+                    running.task_id, task.name AS task_name, running.name,
+                    running.date_time, running.elapsed_hours
+                FROM %s running
+                JOIN hr_employee employee ON employee.id = running.employee_id
+                JOIN project_project project ON project.id = running.project_id
+                LEFT JOIN project_task task ON task.id = running.task_id
+                WHERE %s
+                ORDER BY running.date_time, running.line_id
+                """,
+                lang,
+                SQL.identifier(self._table),
+                SQL(" AND ").join(conditions),
+            )
+        )
+        return self.env.cr.dictfetchall()
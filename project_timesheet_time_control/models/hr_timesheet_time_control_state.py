@@ -0,0 +1,176 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from collections import Counter, defaultdict
+
+from odoo import api, fields, models
+
+from .hr_timesheet_time_control_running import RUNNING_CHANNEL
+
+
+class HrTimesheetTimeControlState(models.Model):
+    _name = "hr.timesheet.time_control.state"
+    _description = "Running timer of a timesheet line"
+    _log_access = False
+    _sql_constraints = [
+        ("line_unique", "UNIQUE(line_id)", "A line can only have one running timer"),
+    ]
+
+    line_id = fields.Many2one(
+        comodel_name="account.analytic.line",
+        required=True,
+        ondelete="cascade",
+        readonly=True,
+    )
+    user_id = fields.Many2one(comodel_name="res.users", index=True, readonly=True)
+    employee_id = fields.Many2one(comodel_name="hr.employee", index=True, readonly=True)
+    project_id = fields.Many2one(
+        comodel_name="project.project", index=True, readonly=True
+    )
+    task_id = fields.Many2one(comodel_name="project.task", index=True, readonly=True)
+    company_id = fields.Many2one(comodel_name="res.company", readonly=True)
+    date_time = fields.Datetime(string="Start Time", readonly=True)
+    heartbeat = fields.Datetime(
+        readonly=True,
+        help="Last time a client reported the timer as still active.",
+    )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        res = super().create(vals_list)
+        res._notify_time_control(res._time_control_targets())
+        return res
+
+    def write(self, vals):
+        if set(vals) == {"heartbeat"}:
+            return super().write(vals)
+        targets = self._time_control_targets()
+        res = super().write(vals)
+        self._notify_time_control(targets | self._time_control_targets())
+        return res
+
+    def unlink(self):
+        targets = self._time_control_targets()
+        res = super().unlink()
+        self._notify_time_control(targets)
+        return res
+
+    def _time_control_targets(self):
+        """Users and records whose time control buttons depend on these states."""
+        return {
+            (state.user_id.id, state.line_id.id, state.project_id.id, state.task_id.id)
+            for state in self
+            if state.user_id
+        }
+
+    @api.model
+    def _notify_time_control(self, targets):
+        """Push the new time control buttons to the affected users.
+
+        The payload maps each model to the ``show_time_control`` value of its
+        records, so open views update their buttons without reloading.
+        Managers following the running timers of the users' companies are
+        told to refresh them.
+        """
+        targets_per_user = defaultdict(set)
+        for user_id, *records in targets:
+            targets_per_user[user_id].add(tuple(records))
+        if not targets_per_user:
+            return
+        running = Counter()
+        for state in self.search([("user_id", "in", list(targets_per_user))]):
+            running[state.user_id.id, "line", state.line_id.id] += 1
+            running[state.user_id.id, "project", state.project_id.id] += 1
+            running[state.user_id.id, "task", state.task_id.id] += 1
+        button_per_lines = {0: "start", 1: "stop"}
+        # Like their computes, projects and tasks without timesheets get no button
+        timesheeted_projects = set(
+            self.env["project.project"]
+            .browse({target[2] for target in targets if target[2]})
+            .filtered("allow_timesheets")
+            .ids
+        )
+        timesheeted_tasks = set(
+            self.env["project.task"]
+            .browse({target[3] for target in targets if target[3]})
+            .filtered("project_id.allow_timesheets")
+            .ids
+        )
+        notifications = []
+        users = self.env["res.users"].browse(targets_per_user)
+        for user in users:
+            payload = defaultdict(dict)
+            for line_id, project_id, task_id in targets_per_user[user.id]:
+                payload["account.analytic.line"][line_id] = (
+                    "stop" if running[user.id, "line", line_id] else "resume"
+                )
+                payload["project.project"][project_id] = (
+                    button_per_lines.get(running[user.id, "project", project_id], False)
+                    if project_id in timesheeted_projects
+                    else False
+                )
+                if task_id:
+                    payload["project.task"][task_id] = (
+                        button_per_lines.get(running[user.id, "task", task_id], False)
+                        if task_id in timesheeted_tasks
+                        else False
+                    )
+            notifications.append(
+                (user.partner_id, "project_timesheet_time_control/timer", payload)
+            )
+        notifications += [
+            ((company, RUNNING_CHANNEL), "project_timesheet_time_control/running", {})
+            for company in users.employee_ids.company_id
+        ]
+        self.env["bus.bus"]._sendmany(notifications)
+
+    @api.model
+    def _prepare_values(self, line):
+        """Values of the running timer state of a timesheet line."""
+        return {
+            "line_id": line.id,
+            "user_id": line.user_id.id,
+            "employee_id": line.employee_id.id,
+            "project_id": line.project_id.id,
+            "task_id": line.task_id.id,
+            "company_id": line.company_id.id,
+            "date_time": line.date_time,
+        }
+
+    @api.model
+    def _heartbeat(self):
+        """Record the current user's running timers as still active.
+
+        :return: Ids of the timesheet lines that are still running.
+        """
+        states = self.sudo().search([("user_id", "=", self.env.uid)])
+        states.write({"heartbeat": fields.Datetime.now()})
+        return states.line_id.ids
+
+    @api.model
+    def _sync_lines(self, lines):
+        """Reflect in this table whether the given lines are running timers.
+
+        Only touches rows whose timer started, stopped or moved, so normal
+        timesheet edits do not invalidate the time control buttons.
+        """
+        states = self.search([("line_id", "in", lines.ids)])
+        running = lines.filtered(
+            lambda line: line.date_time and not line.unit_amount and line.project_id
+        )
+        states.filtered(lambda state: state.line_id not in running).unlink()
+        states_per_line = {state.line_id: state for state in states}
+        to_create = []
+        for line in running:
+            vals = self._prepare_values(line)
+            state = states_per_line.get(line)
+            if not state:
+                to_create.append(vals)
+                continue
+            changed = {
+                name: value
+                for name, value in vals.items()
+                if state._fields[name].convert_to_write(state[name], state) != value
+            }
+            if changed:
+                state.write(changed)
+        return self.create(to_create)
@@ -0,0 +1,106 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+
+class HrTimesheetTimeControlSummary(models.Model):
+    _name = "hr.timesheet.time_control.summary"
+    _description = "Daily clocked time per employee, project and task"
+    _order = "date desc, employee_id"
+    _log_access = False
+
+    employee_id = fields.Many2one(comodel_name="hr.employee", index=True, readonly=True)
+    date = fields.Date(index=True, readonly=True)
+    project_id = fields.Many2one(comodel_name="project.project", readonly=True)
+    task_id = fields.Many2one(comodel_name="project.task", readonly=True)
+    company_id = fields.Many2one(comodel_name="res.company", readonly=True)
+    clocked_hours = fields.Float(readonly=True)
+    first_start = fields.Datetime(readonly=True, group_operator="min")
+    last_end = fields.Datetime(readonly=True, group_operator="max")
+    switch_count = fields.Integer(
+        string="Switches",
+        readonly=True,
+        help="Amount of timers started that day.",
+    )
+    running_count = fields.Integer(
+        string="Running Timers",
+        readonly=True,
+        help="Amount of timers of that day still running.",
+    )
+
+    def _aggregate_query(self, where):
+        """Query aggregating time controlled lines by employee and day."""
+        return SQL(
+            """
+            INSERT INTO %s (
+                employee_id, date, project_id, task_id, company_id,
+                clocked_hours, first_start, last_end, switch_count, running_count
+            )
+            SELECT aal.employee_id, aal.date, aal.project_id, aal.task_id,
+                aal.company_id,
+                COALESCE(
+                    SUM(aal.unit_amount) FILTER (WHERE aal.product_uom_id = %s), 0
+                ),
+                MIN(aal.date_time),
+                MAX(aal.date_time_end),
+                COUNT(*),
+                COUNT(*) FILTER (WHERE aal.unit_amount = 0)
+            FROM account_analytic_line aal
+            WHERE aal.employee_id IS NOT NULL
+                AND aal.project_id IS NOT NULL
+                AND aal.date_time IS NOT NULL
+                AND %s
+            GROUP BY aal.employee_id, aal.date, aal.project_id, aal.task_id,
+                aal.company_id
+            """,
+            SQL.identifier(self._table),
+            self.env.ref("uom.product_uom_hour").id,
+            where,
+        )
+
+    @api.model
+    def _refresh(self, keys):
+        """Recompute the summary of some employees' days.
+
+        :param keys: Iterable of ``(employee_id, date)`` pairs to refresh.
+        """
+        keys = {(employee_id, date) for employee_id, date in keys if employee_id}
+        if not keys:
+            return
+        employee_ids = [employee_id for employee_id, _date in keys]
+        dates = [date for _employee_id, date in keys]
+        self.env["account.analytic.line"].flush_model()
+        self.env.cr.execute(
+            SQL(
+                """
+                DELETE FROM %s summary
+                USING unnest(%s::int[], %s::date[]) AS key(employee_id, date)
+                WHERE summary.employee_id = key.employee_id
+                    AND summary.date = key.date
+                """,
+                SQL.identifier(self._table),
+                employee_ids,
+                dates,
+            )
+        )
+        self.env.cr.execute(
+            self._aggregate_query(
+                SQL(
+                    """(aal.employee_id, aal.date) IN (
+                        SELECT * FROM unnest(%s::int[], %s::date[])
+                    )""",
+                    employee_ids,
+                    dates,
+                )
+            )
+        )
+        self.invalidate_model()
+
+    @api.model
+    def _refresh_all(self):
+        """Rebuild the whole summary."""
+        self.env["account.analytic.line"].flush_model()
+        self.env.cr.execute(SQL("TRUNCATE %s", SQL.identifier(self._table)))
+        self.env.cr.execute(self._aggregate_query(SQL("TRUE")))
+        self.invalidate_model()
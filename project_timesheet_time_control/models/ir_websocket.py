@@ -0,0 +1,19 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import models
+
+from .hr_timesheet_time_control_running import RUNNING_CHANNEL
+
+
+class IrWebsocket(models.AbstractModel):
+    _inherit = "ir.websocket"
+
+    def _build_bus_channel_list(self, channels):
+        """Let timesheet approvers follow running timers of their companies."""
+        if self.env.uid and self.env.user.has_group(
+            "hr_timesheet.group_hr_timesheet_approver"
+        ):
+            channels = list(channels) + [
+                (company, RUNNING_CHANNEL) for company in self.env.user.company_ids
+            ]
+        return super()._build_bus_channel_list(channels)
@@ -1,18 +1,23 @@
 # Copyright 2019 Tecnativa - Jairo Llopis
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
-from odoo import api, models
+from odoo import api, fields, models
 
 
 class ProjectProject(models.Model):
     _name = "project.project"
     _inherit = ["project.project", "hr.timesheet.time_control.mixin"]
 
+    time_control_state_ids = fields.One2many(
+        comodel_name="hr.timesheet.time_control.state",
+        inverse_name="project_id",
+    )
+
     @api.model
     def _relation_with_timesheet_line(self):
         return "project_id"
 
-    @api.depends("allow_timesheets")
+    @api.depends("allow_timesheets", "time_control_state_ids")
     def _compute_show_time_control(self):
         result = super()._compute_show_time_control()
         for project in self:
@@ -1,22 +1,23 @@
 # Copyright 2019 Tecnativa - Jairo Llopis
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
-from odoo import api, models
+from odoo import api, fields, models
 
 
 class ProjectTask(models.Model):
     _name = "project.task"
     _inherit = ["project.task", "hr.timesheet.time_control.mixin"]
 
+    time_control_state_ids = fields.One2many(
+        comodel_name="hr.timesheet.time_control.state",
+        inverse_name="task_id",
+    )
+
     @api.model
     def _relation_with_timesheet_line(self):
         return "task_id"
 
-    @api.depends(
-        "project_id.allow_timesheets",
-        "timesheet_ids.employee_id",
-        "timesheet_ids.unit_amount",
-    )
+    @api.depends("project_id.allow_timesheets", "time_control_state_ids")
     def _compute_show_time_control(self):
         result = super()._compute_show_time_control()
         for task in self:
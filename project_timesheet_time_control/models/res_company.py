@@ -0,0 +1,18 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import fields, models
+
+
+class ResCompany(models.Model):
+    _inherit = "res.company"
+
+    timesheet_timer_max_duration = fields.Float(
+        string="Maximum Timer Duration",
+        help="Running timers without activity for longer than these hours are "
+        "stopped automatically. Leave it empty to never stop them.",
+    )
+    timesheet_prevent_overlap = fields.Boolean(
+        string="Prevent Overlapping Timesheets",
+        help="Forbid timesheet lines of an employee whose start and end times "
+        "overlap each other.",
+    )
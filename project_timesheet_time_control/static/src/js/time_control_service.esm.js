@@ -0,0 +1,31 @@
+/** @odoo-module */
+/* License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl). */
+
+import {EventBus} from "@odoo/owl";
+import {registry} from "@web/core/registry";
+
+export const TIMER_NOTIFICATION = "project_timesheet_time_control/timer";
+export const RUNNING_NOTIFICATION = "project_timesheet_time_control/running";
+
+/**
+ * Relay the timer start/stop notifications pushed to the current user.
+ *
+ * Payloads map model names to the new show_time_control value of their
+ * records, indexed by record id. Managers are also told when running timers
+ * of their companies change.
+ */
+export const timeControlService = {
+    dependencies: ["bus_service"],
+    start(env, {bus_service}) {
+        const bus = new EventBus();
+        bus_service.subscribe(TIMER_NOTIFICATION, (payload) => {
+            bus.trigger("TIMER_CHANGED", payload);
+        });
+        bus_service.subscribe(RUNNING_NOTIFICATION, () => {
+            bus.trigger("RUNNING_CHANGED");
+        });
+        return bus;
+    },
+};
+
+registry.category("services").add("time_control", timeControlService);
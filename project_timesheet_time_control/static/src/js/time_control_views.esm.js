@@ -0,0 +1,66 @@
+/** @odoo-module */
+/* License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl). */
+
+import {FormController} from "@web/views/form/form_controller";
+import {KanbanController} from "@web/views/kanban/kanban_controller";
+import {ListController} from "@web/views/list/list_controller";
+import {patch} from "@web/core/utils/patch";
+import {useBus, useService} from "@web/core/utils/hooks";
+
+const RUNNING_MODEL = "hr.timesheet.time_control.running";
+
+/**
+ * Yield the loaded records of a view, looking inside groups.
+ */
+function* loadedRecords(root) {
+    if (root.groups) {
+        for (const group of root.groups) {
+            yield* loadedRecords(group.list);
+        }
+    } else if (root.records) {
+        yield* root.records;
+    } else {
+        yield root;
+    }
+}
+
+/**
+ * Update time control buttons of a view from a timer notification.
+ */
+function applyTimerStates(model, payload) {
+    const states = payload[model.config.resModel];
+    if (!states || !model.root) {
+        return;
+    }
+    for (const record of loadedRecords(model.root)) {
+        if (
+            record.resId in states &&
+            "show_time_control" in record.data &&
+            record.data.show_time_control !== states[record.resId]
+        ) {
+            record._applyValues({show_time_control: states[record.resId]});
+        }
+    }
+}
+
+function useTimeControlUpdates(controller) {
+    const timeControl = useService("time_control");
+    useBus(timeControl, "TIMER_CHANGED", (ev) =>
+        applyTimerStates(controller.model, ev.detail)
+    );
+    // The running timers dashboard is refreshed when timers change
+    useBus(timeControl, "RUNNING_CHANGED", () => {
+        if (controller.model.config.resModel === RUNNING_MODEL) {
+            controller.model.load();
+        }
+    });
+}
+
+for (const Controller of [FormController, KanbanController, ListController]) {
+    patch(Controller.prototype, {
+        setup() {
+            super.setup(...arguments);
+            useTimeControlUpdates(this);
+        },
+    });
+}
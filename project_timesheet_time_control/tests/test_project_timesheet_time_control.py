@@ -1,7 +1,12 @@
 # Copyright 2016-2018 Tecnativa - Pedro M. Baeza
 # License AGPL-3 - See http://www.gnu.org/licenses/agpl-3.0
 
+import base64
+import io
+import json
+from collections import defaultdict
 from datetime import date, datetime, timedelta
+from unittest.mock import patch
 
 from odoo import exceptions
 from odoo.tests import Form, common
@@ -278,3 +283,672 @@ class TestProjectTimesheetTimeControl(common.TransactionCase):
         )
         line.unit_amount = 500.0
         self.assertFalse(line.date_time_end)
+
+    def test_running_timers(self):
+        """Running timers are found by employee or user through the index."""
+        aal_model = self.env["account.analytic.line"]
+        self.env.cr.execute(
+            "SELECT indexdef FROM pg_indexes WHERE indexname = %s",
+            ("account_analytic_line_running_employee_id_index",),
+        )
+        self.assertIn("unit_amount = ", self.env.cr.fetchone()[0])
+        employee = self.env.user.employee_ids
+        self.assertEqual(aal_model._running_timers(employees=employee), self.line)
+        self.assertEqual(aal_model._running_timers(), self.line)
+        self.assertFalse(aal_model._running_timers(employees=self.other_employee))
+        self.line.button_end_work()
+        self.assertFalse(aal_model._running_timers(employees=employee))
+        self.assertFalse(aal_model._running_timers(users=self.env.user))
+
+    def test_time_control_state(self):
+        """Running timers are mirrored in the time control state table."""
+        state_model = self.env["hr.timesheet.time_control.state"]
+        state = state_model.search([("line_id", "=", self.line.id)])
+        self.assertEqual(state.user_id, self.env.user)
+        self.assertEqual(state.task_id, self.task)
+        self.assertEqual(state.project_id, self.project)
+        self.assertEqual(self.task.time_control_state_ids, state)
+        self.assertEqual(state.company_id, self.line.company_id)
+        # Timesheet users only see their own running timers
+        user = common.new_test_user(
+            self.env, "time_control_user", "hr_timesheet.group_hr_timesheet_user"
+        )
+        self.assertFalse(state_model.with_user(user).search([]))
+        # Editing other fields of a running line keeps its state
+        self.line.name = "Renamed line"
+        self.assertTrue(state.exists())
+        # Stopping the timer drops the state and refreshes the buttons
+        self.line.button_end_work()
+        self.assertFalse(state.exists())
+        self.assertEqual(self.task.show_time_control, "start")
+        running_timer = self.line.copy({"unit_amount": 0})
+        self.assertEqual(self.task.show_time_control, "stop")
+        running_timer.unlink()
+        self.assertFalse(state_model.search([("task_id", "=", self.task.id)]))
+        self.assertEqual(self.task.show_time_control, "start")
+
+    def test_button_end_work_batch(self):
+        """Timers are stopped through write(), refreshing their state once."""
+        aal_model = self.env["account.analytic.line"]
+        self.line.button_end_work()
+        # Timers started at different times are stopped with different durations
+        lines = aal_model.create(
+            [
+                {
+                    "date_time": datetime(2020, 8, 1, 10, 0, 0)
+                    + timedelta(minutes=3 * index),
+                    "task_id": self.task.id,
+                    "project_id": self.project.id,
+                    "account_id": self.analytic_account.id,
+                    "name": "Bulk line %d" % index,
+                }
+                for index in range(10)
+            ]
+        )
+        model_class = type(aal_model)
+        calls = defaultdict(list)
+
+        def spy(name):
+            origin = getattr(model_class, name)
+
+            def method(records, *args):
+                calls[name].append((records, *args))
+                return origin(records, *args)
+
+            return patch.object(model_class, name, method)
+
+        with spy("write"), spy("_sync_time_control_state"), spy(
+            "_refresh_time_control_summary"
+        ):
+            lines.with_context(stop_dt=datetime(2020, 8, 1, 12, 0, 0)).button_end_work()
+        # Other modules' write() overrides see every stop
+        stopped = aal_model.union(
+            *(records for records, vals in calls["write"] if "unit_amount" in vals)
+        )
+        self.assertEqual(stopped, lines)
+        self.assertEqual(len(calls["_sync_time_control_state"]), 1)
+        self.assertEqual(len(calls["_refresh_time_control_summary"]), 1)
+        self.assertEqual(
+            lines.mapped("unit_amount"),
+            [(120 - 3 * index) / 60 for index in range(10)],
+        )
+        self.assertEqual(
+            lines.mapped("date_time_end"), [datetime(2020, 8, 1, 12, 0, 0)] * 10
+        )
+        self.assertFalse(
+            self.env["hr.timesheet.time_control.state"].search(
+                [("line_id", "in", lines.ids)]
+            )
+        )
+        with self.assertRaises(exceptions.UserError):
+            (lines[0] | lines[0].copy({"unit_amount": 0})).button_end_work()
+
+    def test_cron_stop_idle_timers(self):
+        """Timers idle for longer than the company maximum are stopped."""
+        aal_model = self.env["account.analytic.line"]
+        forgotten = self.line.copy(
+            {"date_time": datetime.now() - timedelta(hours=20), "unit_amount": 0}
+        )
+        active = self.line.copy(
+            {"date_time": datetime.now() - timedelta(hours=20), "unit_amount": 0}
+        )
+        state_model = self.env["hr.timesheet.time_control.state"]
+        heartbeat = active.date_time + timedelta(hours=15)
+        state_model.search([("line_id", "=", active.id)]).heartbeat = heartbeat
+        # Nothing happens until the company sets a maximum duration
+        aal_model._cron_stop_idle_timers()
+        self.assertFalse(forgotten.unit_amount)
+        self.env.company.timesheet_timer_max_duration = 8
+        aal_model._cron_stop_idle_timers(chunk_size=1)
+        self.assertEqual(forgotten.unit_amount, 8)
+        self.assertFalse(active.unit_amount)
+        self.assertFalse(self.line.unit_amount)
+        # A timer with an old heartbeat is stopped at that heartbeat
+        self.env.company.timesheet_timer_max_duration = 2
+        aal_model._cron_stop_idle_timers()
+        self.assertEqual(active.unit_amount, 15)
+        self.assertFalse(self.line.unit_amount)
+
+    def test_heartbeat(self):
+        """Heartbeats are stored in the state table, not in the lines."""
+        state_model = self.env["hr.timesheet.time_control.state"]
+        self.assertEqual(state_model._heartbeat(), self.line.ids)
+        state = state_model.search([("line_id", "=", self.line.id)])
+        self.assertTrue(state.heartbeat)
+        self.assertFalse(self.line.unit_amount)
+
+    def test_switch_timer(self):
+        """Switching timers without the wizard stops and starts lines."""
+        aal_model = self.env["account.analytic.line"]
+        result = aal_model._switch_timer(False, task_id=self.task.id, name="Quick")
+        new_line = aal_model.browse(result["id"])
+        self.assertEqual(new_line.name, "Quick")
+        self.assertEqual(new_line.project_id, self.project)
+        self.assertEqual(new_line.task_id, self.task)
+        self.assertEqual(new_line.employee_id, self.env.user.employee_ids)
+        self.assertAlmostEqual(self.line.unit_amount, 1, places=1)
+        self.assertEqual(aal_model._running_timers(), new_line)
+        # Several running timers cannot be switched
+        new_line.copy({"unit_amount": 0})
+        with self.assertRaises(exceptions.UserError):
+            aal_model._switch_timer(self.project.id)
+        with self.assertRaises(exceptions.UserError):
+            aal_model._switch_timer(False)
+
+    def test_switch_timer_all_employees(self):
+        """Timers of every employee of the user are stopped when switching."""
+        company = self.env["res.company"].create({"name": "Other company"})
+        self.env.user.company_ids |= company
+        other = self.env["hr.employee"].create(
+            {"name": "Other company", "company_id": company.id, "user_id": self.uid}
+        )
+        aal_model = self.env["account.analytic.line"]
+        self.line.button_end_work()
+        project = (
+            self.env["project.project"]
+            .with_company(company)
+            .create({"name": "Other company project", "allow_timesheets": True})
+        )
+        running = aal_model.with_company(company).create(
+            {
+                "date_time": datetime.now() - timedelta(hours=1),
+                "employee_id": other.id,
+                "project_id": project.id,
+                "name": "Other company line",
+            }
+        )
+        result = aal_model._switch_timer(self.project.id)
+        self.assertTrue(running.unit_amount)
+        self.assertEqual(
+            aal_model._running_timers(employees=self.env.user.employee_ids),
+            aal_model.browse(result["id"]),
+        )
+
+    def test_lock_timers(self):
+        """Employees get one lock row, whatever the amount of timer changes."""
+        lock_model = self.env["hr.timesheet.time_control.lock"]
+        employee = self.env.user.employee_ids
+        self.line.button_end_work()
+        self.env["account.analytic.line"]._switch_timer(self.project.id)
+        self.assertEqual(
+            lock_model.search_count([("employee_id", "=", employee.id)]), 1
+        )
+
+    def test_time_overlap(self):
+        """Overlapping intervals are reported and optionally forbidden."""
+        aal_model = self.env["account.analytic.line"]
+        employee = self.env.user.employee_ids
+        self.line.button_end_work()
+        vals = {
+            "task_id": self.task.id,
+            "project_id": self.project.id,
+            "account_id": self.analytic_account.id,
+            "name": "Interval",
+        }
+        first, second, third = aal_model.create(
+            [
+                dict(vals, date_time=datetime(2020, 8, 1, 8), unit_amount=2),
+                dict(vals, date_time=datetime(2020, 8, 1, 10), unit_amount=1),
+                dict(vals, date_time=datetime(2020, 8, 1, 10, 30), unit_amount=1),
+            ]
+        )
+        period = (datetime(2020, 8, 1), datetime(2020, 8, 2))
+        self.assertEqual(
+            aal_model._get_overlapping_lines(employee, *period), second | third
+        )
+        self.assertFalse(aal_model._get_overlapping_lines(self.other_employee, *period))
+        # Hard constraint mode
+        self.env.company.timesheet_prevent_overlap = True
+        with self.assertRaises(exceptions.ValidationError), self.env.cr.savepoint():
+            aal_model.create(
+                dict(vals, date_time=datetime(2020, 8, 1, 9), unit_amount=0.5)
+            )
+        third.date_time = datetime(2020, 8, 1, 11)
+        self.assertFalse(aal_model._get_overlapping_lines(employee, *period))
+        self.assertEqual(first.unit_amount, 2)
+
+    def test_active_lines(self):
+        """Lines active in a window or at an instant are found by range."""
+        aal_model = self.env["account.analytic.line"]
+        line = aal_model.create(
+            {
+                "date_time": datetime(2020, 8, 1, 10),
+                "unit_amount": 2,
+                "project_id": self.project.id,
+                "name": "Finished line",
+            }
+        )
+        self.assertEqual(line.date_time_end, datetime(2020, 8, 1, 12))
+        at_11 = aal_model._get_active_lines(datetime(2020, 8, 1, 11))
+        self.assertEqual(at_11, line)
+        window = (datetime(2020, 8, 1, 14), datetime(2020, 8, 1, 15))
+        self.assertFalse(aal_model._get_active_lines(*window))
+        # Running timers are open-ended
+        self.assertEqual(
+            aal_model._get_active_lines(datetime.now(), projects=self.project),
+            self.line,
+        )
+        self.assertEqual(
+            aal_model._get_active_employees(datetime.now(), projects=self.project),
+            self.env.user.employee_ids,
+        )
+        # Stopping a timer stores its end
+        self.line.button_end_work()
+        self.assertTrue(self.line.date_time_end)
+        self.assertFalse(
+            aal_model._get_active_lines(
+                datetime.now() + timedelta(hours=1), projects=self.project
+            )
+        )
+
+    def test_active_lines_negative_duration(self):
+        """Corrections with a negative duration never break range queries."""
+        aal_model = self.env["account.analytic.line"]
+        correction = aal_model.create(
+            {
+                "date_time": datetime(2020, 8, 1, 10),
+                "unit_amount": -1,
+                "project_id": self.project.id,
+                "name": "Correction",
+            }
+        )
+        self.assertLess(correction.date_time_end, correction.date_time)
+        # Without the partial index, ranges may be built before filtering
+        self.env.cr.execute("DROP INDEX account_analytic_line_time_range_index")
+        self.assertFalse(aal_model._get_active_lines(datetime(2020, 8, 1, 9, 30)))
+        window = (datetime(2020, 8, 1, 8), datetime(2020, 8, 1, 11))
+        self.assertNotIn(correction, aal_model._get_active_lines(*window))
+
+    def test_import_time_clock(self):
+        """Time clock exports are imported in batches."""
+        aal_model = self.env["account.analytic.line"].with_context(tz="EST")
+        employee = self.env.user.employee_ids
+        content = "\n".join(
+            [
+                "employee,project,task,name,date_time,date_time_end",
+                f"{employee.name},{self.project.name},{self.task.name},A,"
+                "2016-03-24 03:00:00,2016-03-24 05:30:00",
+                f"{employee.name},{self.project.name},,B,"
+                "2016-03-24 06:00:00,2016-03-24 07:00:00",
+                f"{employee.name},{self.project.name},,C,2016-03-24 08:00:00,",
+            ]
+        )
+        self.line.button_end_work()
+        imported = aal_model._import_time_clock(
+            io.BytesIO(content.encode()), batch_size=2
+        )
+        self.assertEqual(imported, 3)
+        lines = aal_model.search(
+            [("employee_id", "=", employee.id), ("name", "in", ["A", "B", "C"])],
+            order="date_time",
+        )
+        self.assertEqual(lines.mapped("unit_amount"), [2.5, 1, 0])
+        self.assertEqual(lines.mapped("task_id"), self.task)
+        self.assertEqual(lines[0].date, date(2016, 3, 23))
+        self.assertEqual(lines[1].date, date(2016, 3, 24))
+        jsonl = b'{"employee": "Nobody", "project": "x", "date_time": "2016"}\n'
+        with self.assertRaises(exceptions.UserError):
+            aal_model._import_time_clock(io.BytesIO(jsonl), "jsonl")
+        # Rows without start or ending before they start are rejected
+        for times in (",", "2016-03-24 09:00:00,2016-03-24 08:00:00"):
+            row = f"{employee.name},{self.project.name},,D,{times}"
+            content = "employee,project,task,name,date_time,date_time_end\n" + row
+            with self.assertRaisesRegex(exceptions.UserError, "row 1"):
+                aal_model._import_time_clock(io.BytesIO(content.encode()))
+        # Names shared by several projects are reported instead of guessed
+        self.project.copy({"name": self.project.name})
+        row = f"{employee.name},{self.project.name},,E,2016-03-24 09:00:00,"
+        content = "employee,project,task,name,date_time,date_time_end\n" + row
+        with self.assertRaisesRegex(exceptions.UserError, "row 1.*ambiguous"):
+            aal_model._import_time_clock(io.BytesIO(content.encode()))
+        # The wizard streams the uploaded file from its attachment
+        wizard = self.env["hr.timesheet.time_control.import"].create(
+            {"data_file": base64.b64encode(jsonl.replace(b"Nobody", b"Someone"))}
+        )
+        with wizard._open_data_file() as file:
+            self.assertIn(b"Someone", file.read())
+
+    def test_recent_activities(self):
+        """Recently timed activities are kept per employee, newest first."""
+        recent_model = self.env["hr.timesheet.time_control.recent"]
+        self.patch(type(recent_model), "_mru_size", 2)
+        employee = self.env.user.employee_ids
+        recent = recent_model.search([("employee_id", "=", employee.id)], limit=1)
+        self.assertEqual(recent.line_id, self.line)
+        self.assertEqual(recent.task_id, self.task)
+        self.line.button_end_work()
+        second = self.line.copy(
+            {
+                "name": "Second",
+                "unit_amount": 0,
+                "date_time": datetime.now() - timedelta(minutes=30),
+            }
+        )
+        self.line.copy(
+            {
+                "name": "Test line",
+                "unit_amount": 0.1,
+                "date_time": datetime.now() - timedelta(minutes=10),
+            }
+        )
+        recents = recent_model.search([("employee_id", "=", employee.id)])
+        self.assertEqual(len(recents), 2)
+        self.assertEqual(recents.mapped("name"), ["Test line", "Second"])
+        # The switch wizard suggests from them and lets picking one
+        switch_model = self.env["hr.timesheet.switch"]
+        suggestion = switch_model.with_context(
+            active_model="project.task", active_id=self.task.id
+        )._closest_suggestion()
+        self.assertEqual(suggestion, recents[0].line_id)
+        with Form(switch_model) as wizard:
+            wizard.recent_activity_id = recents[1]
+            self.assertEqual(wizard.name, "Second")
+            self.assertEqual(wizard.analytic_line_id, second)
+            self.assertEqual(wizard.task_id, self.task)
+        # Edited or deleted lines do not leave stale activities behind
+        second.name = "Renamed"
+        recents = recent_model.search([("employee_id", "=", employee.id)])
+        self.assertEqual(recents.mapped("name"), ["Test line", "Renamed"])
+        second.unlink()
+        recents = recent_model.search([("employee_id", "=", employee.id)])
+        self.assertEqual(recents.mapped("name"), ["Test line"])
+        # Timesheet users only see their own activities
+        user = common.new_test_user(
+            self.env, "recent_user", "hr_timesheet.group_hr_timesheet_user"
+        )
+        self.assertFalse(recent_model.with_user(user).search([]))
+
+    def test_time_control_summary(self):
+        """Daily summary is refreshed from touched lines."""
+        summary_model = self.env["hr.timesheet.time_control.summary"]
+        employee = self.env.user.employee_ids
+        domain = [("employee_id", "=", employee.id), ("date", "=", date(2020, 8, 1))]
+        line = self.line.copy({"date_time": datetime(2020, 8, 1, 10), "unit_amount": 0})
+        summary = summary_model.search(domain)
+        self.assertEqual(summary.task_id, self.task)
+        self.assertEqual(summary.running_count, 1)
+        self.assertEqual(summary.first_start, datetime(2020, 8, 1, 10))
+        line.with_context(stop_dt=datetime(2020, 8, 1, 12)).button_end_work()
+        line.copy({"date_time": datetime(2020, 8, 1, 13), "unit_amount": 1})
+        summary = summary_model.search(domain)
+        self.assertEqual(summary.running_count, 0)
+        self.assertEqual(summary.switch_count, 2)
+        self.assertEqual(summary.clocked_hours, 3)
+        self.assertEqual(summary.last_end, datetime(2020, 8, 1, 14))
+        # Other companies do not see it
+        company = self.env["res.company"].create({"name": "Other company"})
+        self.env.user.company_ids |= company
+        self.assertFalse(
+            summary_model.with_context(allowed_company_ids=company.ids).search(domain)
+        )
+        # Moving lines to another day moves them in the summary
+        line.date_time = datetime(2020, 8, 3, 10)
+        self.assertEqual(summary_model.search(domain).clocked_hours, 1)
+        line.unlink()
+        self.assertEqual(summary_model.search(domain).switch_count, 1)
+
+    def _timer_notifications(self):
+        messages = (
+            self.env["bus.bus"]
+            .sudo()
+            .search([("message", "like", "project_timesheet_time_control/timer")])
+            .mapped("message")
+        )
+        return [json.loads(message)["payload"] for message in messages]
+
+    def test_time_control_notifications(self):
+        """Starting and stopping timers pushes the new buttons to the user."""
+        self.env["bus.bus"].sudo().search([]).unlink()
+        self.line.button_end_work()
+        (payload,) = self._timer_notifications()
+        self.assertEqual(
+            payload["account.analytic.line"], {str(self.line.id): "resume"}
+        )
+        self.assertEqual(payload["project.project"], {str(self.project.id): "start"})
+        self.assertEqual(payload["project.task"], {str(self.task.id): "start"})
+        # Heartbeats do not change any button
+        self.env["bus.bus"].sudo().search([]).unlink()
+        self.line.copy({"date_time": datetime.now(), "unit_amount": 0})
+        self.env["hr.timesheet.time_control.state"]._heartbeat()
+        (payload,) = self._timer_notifications()
+        self.assertEqual(payload["project.task"], {str(self.task.id): "stop"})
+        # Projects without timesheets never get a button
+        self.env["bus.bus"].sudo().search([]).unlink()
+        project = self.project_without_timesheets
+        self.env["hr.timesheet.time_control.state"]._notify_time_control(
+            {(self.uid, self.line.id, project.id, False)}
+        )
+        (payload,) = self._timer_notifications()
+        self.assertEqual(payload["project.project"], {str(project.id): False})
+
+    def _read_queries(self, records, specification):
+        """Count queries needed to load a list of records from scratch."""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        queries = self.cr.sql_log_count
+        records.web_search_read([("id", "in", records.ids)], specification)
+        return self.cr.sql_log_count - queries
+
+    def _assert_constant_read_queries(self, records, specification):
+        """Loading more records must not need more queries."""
+        # Warm up caches that only fill once per registry
+        self._read_queries(records[:2], specification)
+        small = self._read_queries(records[:2], specification)
+        self.assertEqual(self._read_queries(records, specification), small)
+
+    def test_show_time_control_queries(self):
+        """Time control buttons are computed in constant queries."""
+        tasks = self.task | self.env["project.task"].create(
+            [
+                {"name": "Task %d" % index, "project_id": project.id}
+                for index in range(10)
+                for project in (self.project, self.project_without_timesheets)
+            ]
+        )
+        for task in tasks[:5]:
+            self.line.copy({"task_id": task.id, "unit_amount": 0})
+        lines = self.env["account.analytic.line"].search(
+            [("project_id", "=", self.project.id)]
+        ) | self.line.copy({"employee_id": self.other_employee.id})
+        self.assertGreater(len(lines), 5)
+        self._assert_constant_read_queries(
+            tasks,
+            {
+                "name": {},
+                "show_time_control": {},
+                "project_id": {"fields": {"display_name": {}}},
+            },
+        )
+        projects = (
+            self.project
+            | self.project_without_timesheets
+            | self.env["project.project"].create(
+                [
+                    {"name": "Project %d" % index, "allow_timesheets": True}
+                    for index in range(10)
+                ]
+            )
+        )
+        for project in projects[2::2]:
+            self.line.copy(
+                {"project_id": project.id, "task_id": False, "unit_amount": 0}
+            )
+        self._assert_constant_read_queries(
+            projects, {"name": {}, "show_time_control": {}}
+        )
+        self._assert_constant_read_queries(
+            lines,
+            {
+                "name": {},
+                "date_time": {},
+                "date_time_end": {},
+                "show_time_control": {},
+            },
+        )
+
+    def test_date_time_end_queries(self):
+        """Computing end times needs the same queries for any amount of lines."""
+        lines = self.line | self.env["account.analytic.line"].create(
+            [
+                {
+                    "date_time": datetime(2020, 8, 1, hour),
+                    "unit_amount": 1,
+                    "project_id": self.project.id,
+                    "name": "Line %d" % hour,
+                }
+                for hour in range(10)
+            ]
+        )
+        counts = []
+        for records in (lines[:2], lines[:2], lines):
+            self.env.invalidate_all()
+            queries = self.cr.sql_log_count
+            records._compute_date_time_end()
+            counts.append(self.cr.sql_log_count - queries)
+        self.assertEqual(counts[1], counts[2])
+
+    def test_ingest_events(self):
+        """Offline timer events are applied in order and only once."""
+        event_model = self.env["hr.timesheet.time_control.event"]
+        self.line.button_end_work()
+        events = [
+            {
+                "key": "stop-1",
+                "type": "stop",
+                "date_time": "2020-08-01 12:30:00",
+            },
+            {
+                "key": "start-1",
+                "type": "start",
+                "date_time": "2020-08-01 10:00:00",
+                "task_id": self.task.id,
+                "name": "Offline",
+            },
+            {
+                "key": "switch-1",
+                "type": "switch",
+                "date_time": "2020-08-01 11:00:00",
+                "project_id": self.project.id,
+            },
+        ]
+        stop, start, switch = event_model._ingest(events)
+        self.assertEqual(start["status"], "applied")
+        self.assertEqual(switch["status"], "applied")
+        self.assertEqual(stop["status"], "applied")
+        self.assertEqual(stop["line_id"], switch["line_id"])
+        started = self.env["account.analytic.line"].browse(start["line_id"])
+        switched = self.env["account.analytic.line"].browse(switch["line_id"])
+        self.assertEqual(started.name, "Offline")
+        self.assertEqual(started.project_id, self.project)
+        self.assertEqual(started.date, date(2020, 8, 1))
+        self.assertEqual(started.unit_amount, 1)
+        self.assertEqual(switched.unit_amount, 1.5)
+        self.assertFalse(switched.task_id)
+        # Replaying the batch changes nothing
+        results = event_model._ingest(events + [dict(events[0], key="stop-2")])
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["duplicate", "duplicate", "duplicate", "ignored"],
+        )
+        self.assertEqual(results[1]["line_id"], started.id)
+        self.assertEqual(event_model.search_count([("key", "like", "-1")]), 3)
+        with self.assertRaises(exceptions.UserError):
+            event_model._ingest([{"key": "bad", "type": "start", "date_time": "x"}])
+        with self.assertRaisesRegex(exceptions.UserError, "no valid date"):
+            event_model._ingest([dict(events[0], key="bad", date_time=1458788400)])
+        with self.assertRaises(exceptions.AccessError):
+            event_model.with_user(self.env.ref("base.user_demo"))._ingest(
+                [dict(events[0], key="other", employee_id=self.other_employee.id)]
+            )
+        # Keys are scoped per employee, so others' lines are never returned
+        (other,) = event_model._ingest(
+            [dict(events[0], employee_id=self.other_employee.id)]
+        )
+        self.assertEqual(other["status"], "ignored")
+        self.assertFalse(other["line_id"])
+
+    def test_ingest_stale_events(self):
+        """Events older than the running timer are reported, not applied."""
+        event_model = self.env["hr.timesheet.time_control.event"]
+        aal_model = self.env["account.analytic.line"]
+        stale = (self.line.date_time - timedelta(minutes=5)).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
+        stop, start = event_model._ingest(
+            [
+                {"key": "stale-stop", "type": "stop", "date_time": stale},
+                {
+                    "key": "stale-start",
+                    "type": "start",
+                    "date_time": stale,
+                    "project_id": self.project.id,
+                },
+            ]
+        )
+        self.assertEqual(stop["status"], "conflict")
+        self.assertEqual(start["status"], "conflict")
+        self.assertEqual(stop["line_id"], self.line.id)
+        self.assertFalse(self.line.unit_amount)
+        self.assertEqual(aal_model._running_timers(), self.line)
+        self.assertFalse(event_model.search([("key", "like", "stale-")]))
+
+    def test_running_overview(self):
+        """Managers get every running timer of the company in one query."""
+        running_model = self.env["hr.timesheet.time_control.running"]
+        department = self.env["hr.department"].create({"name": "Field"})
+        self.other_employee.department_id = department
+        other_line = self.line.copy(
+            {
+                "date_time": self.line.date_time,
+                "employee_id": self.other_employee.id,
+                "unit_amount": 0,
+            }
+        )
+        self.line.copy({"date_time": datetime.now(), "unit_amount": 1})
+        rows = running_model._overview()
+        line_ids = [row["line_id"] for row in rows]
+        self.assertIn(self.line.id, line_ids)
+        self.assertIn(other_line.id, line_ids)
+        self.assertEqual(len(line_ids), running_model.search_count([]))
+        queries = self.cr.sql_log_count
+        (row,) = running_model._overview(
+            departments=self.env["hr.department"].search([("id", "=", department.id)])
+        )
+        self.assertLessEqual(self.cr.sql_log_count - queries, 3)
+        self.assertEqual(row["line_id"], other_line.id)
+        self.assertEqual(row["employee_name"], "Somebody else")
+        self.assertEqual(row["project_name"], self.project.name)
+        self.assertEqual(row["task_name"], self.task.name)
+        self.assertAlmostEqual(row["elapsed_hours"], 1, delta=0.1)
+        (row,) = running_model._overview(employees=self.env.user.employee_ids)
+        self.assertEqual(row["line_id"], self.line.id)
+
+    def test_export_time_control(self):
+        """Time controlled lines are exported in batches with their end times."""
+        self.env.user.tz = "UTC"
+        line_model = self.env["account.analytic.line"]
+        lines = line_model.create(
+            [
+                {
+                    "date_time": datetime(2020, 8, 1, hour),
+                    "unit_amount": 0.5,
+                    "project_id": self.project.id,
+                    "task_id": self.task.id,
+                    "name": "Export %d" % hour,
+                }
+                for hour in range(3)
+            ]
+        )
+        domain = [("id", "in", lines.ids)]
+        batches = list(line_model._time_control_export_rows(domain, batch_size=2))
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        row = batches[0][0]
+        self.assertEqual(row[1], self.project.name)
+        self.assertEqual(row[2], self.task.name)
+        self.assertEqual(row[3], "Export 0")
+        self.assertEqual(row[5], datetime(2020, 8, 1, 0))
+        self.assertEqual(row[6], datetime(2020, 8, 1, 0, 30))
+        content = b"".join(line_model._time_control_export_chunks(domain, "csv", 2))
+        self.assertEqual(len(content.decode().splitlines()), 4)
+        content = b"".join(line_model._time_control_export_chunks(domain, "xlsx", 2))
+        self.assertTrue(content.startswith(b"PK"))
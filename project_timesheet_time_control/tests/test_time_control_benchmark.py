@@ -0,0 +1,218 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from odoo import release
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+
+def _env_int(name, default):
+    return int(os.environ.get(f"TIME_CONTROL_BENCHMARK_{name}", default))
+
+
+@tagged("-standard", "-at_install", "post_install", "time_control_benchmark")
+class TestTimeControlBenchmark(TransactionCase):
+    """Measure time control flows on a seeded database.
+
+    Sizes are read from ``TIME_CONTROL_BENCHMARK_*`` environment variables,
+    and the JSON report is written to ``TIME_CONTROL_BENCHMARK_REPORT`` when
+    set, so reports of different releases can be compared.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.sizes = [
+            int(size)
+            for size in os.environ.get(
+                "TIME_CONTROL_BENCHMARK_SIZES", "10,100,1000"
+            ).split(",")
+        ]
+        cls.employees_amount = _env_int("EMPLOYEES", max(cls.sizes))
+        cls.projects_amount = _env_int("PROJECTS", 50)
+        cls.tasks_per_project = _env_int("TASKS", 20)
+        cls.history_per_employee = _env_int("HISTORY", 50)
+        cls.results = []
+        cls.user = cls.env["res.users"].create(
+            {
+                "name": "Benchmark user",
+                "login": "time_control_benchmark",
+                "groups_id": [
+                    (4, cls.env.ref("hr_timesheet.group_hr_timesheet_user").id)
+                ],
+            }
+        )
+        cls.env["hr.employee"].create({"name": "Benchmark", "user_id": cls.user.id})
+        cls.employees = cls.env["hr.employee"].create(
+            [
+                {"name": "Benchmark employee %d" % index}
+                for index in range(cls.employees_amount)
+            ]
+        )
+        cls.projects = cls.env["project.project"].create(
+            [
+                {"name": "Benchmark project %d" % index, "allow_timesheets": True}
+                for index in range(cls.projects_amount)
+            ]
+        )
+        cls.tasks = cls.env["project.task"].create(
+            [
+                {"name": "Benchmark task %d" % index, "project_id": project.id}
+                for project in cls.projects
+                for index in range(cls.tasks_per_project)
+            ]
+        )
+        cls._seed_history()
+
+    @classmethod
+    def _seed_history(cls):
+        """Insert stopped lines in SQL, the ORM would take hours on big sizes."""
+        cls.env.flush_all()
+        employees = cls.employees | cls.user.employee_ids
+        cls.env.cr.execute(
+            SQL(
+                """
+                INSERT INTO account_analytic_line (
+                    name, date, amount, unit_amount, product_uom_id,
+                    account_id, company_id, project_id, task_id, employee_id,
+                    user_id, date_time, date_time_end,
+                    create_uid, write_uid, create_date, write_date
+                )
+                SELECT 'History', seed.start::date, 0, 1, %s,
+                    (%s::int[])[seed.pos], %s, (%s::int[])[seed.pos],
+                    (%s::int[])[seed.pos], seed.employee_id, seed.user_id,
+                    seed.start, seed.start + interval '1 hour',
+                    %s, %s, now(), now()
+                FROM (
+                    SELECT emp.employee_id, emp.user_id,
+                        mod(emp.employee_id + n, %s) + 1 AS pos,
+                        now() at time zone 'UTC' - n * interval '2 hours' AS start
+                    FROM unnest(%s::int[], %s::int[]) AS emp(employee_id, user_id),
+                        generate_series(1, %s) AS n
+                ) AS seed
+                """,
+                cls.env.ref("uom.product_uom_hour").id,
+                [task.project_id.analytic_account_id.id for task in cls.tasks],
+                cls.env.company.id,
+                [task.project_id.id for task in cls.tasks],
+                cls.tasks.ids,
+                cls.env.uid,
+                cls.env.uid,
+                len(cls.tasks),
+                employees.ids,
+                [employee.user_id.id or None for employee in employees],
+                cls.history_per_employee,
+            )
+        )
+        cls.env.cr.execute("ANALYZE account_analytic_line")
+        cls.env["account.analytic.line"].invalidate_model()
+
+    @classmethod
+    def tearDownClass(cls):
+        report = {
+            "odoo": release.version,
+            "module": cls.env.ref(
+                "base.module_project_timesheet_time_control"
+            ).latest_version,
+            "sizes": {
+                "employees": cls.employees_amount,
+                "projects": cls.projects_amount,
+                "tasks_per_project": cls.tasks_per_project,
+                "history_per_employee": cls.history_per_employee,
+            },
+            "results": cls.results,
+        }
+        path = os.environ.get("TIME_CONTROL_BENCHMARK_REPORT")
+        if path:
+            with open(path, "w") as report_file:
+                json.dump(report, report_file, indent=2)
+        _logger.info("Time control benchmark: %s", json.dumps(report))
+        super().tearDownClass()
+
+    @contextmanager
+    def measure(self, operation, size):
+        """Record wall time and queries of the wrapped block."""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        queries = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        yield
+        self.env.flush_all()
+        self.results.append(
+            {
+                "operation": operation,
+                "size": size,
+                "seconds": round(time.perf_counter() - start, 4),
+                "queries": self.env.cr.sql_log_count - queries,
+            }
+        )
+
+    def _switch_wizard(self, task):
+        return (
+            self.env["hr.timesheet.switch"]
+            .with_user(self.user)
+            .with_context(active_model="project.task", active_id=task.id)
+        )
+
+    def test_button_start_work(self):
+        for size in self.sizes:
+            tasks = self.tasks[:size].with_user(self.user)
+            with self.measure("button_start_work", size):
+                for task in tasks:
+                    task.button_start_work()
+
+    def test_default_get(self):
+        fields_list = list(self.env["hr.timesheet.switch"]._fields)
+        for size in self.sizes:
+            tasks = self.tasks[:size]
+            with self.measure("default_get", size):
+                for task in tasks:
+                    self._switch_wizard(task).default_get(fields_list)
+
+    def test_action_switch(self):
+        for size in self.sizes:
+            tasks = self.tasks[:size]
+            with self.measure("action_switch", size):
+                for task in tasks:
+                    self._switch_wizard(task).create(
+                        {"name": "Switch", "task_id": task.id}
+                    ).action_switch()
+
+    def test_button_end_work(self):
+        start = datetime.now() - timedelta(hours=1)
+        for size in self.sizes:
+            lines = self.env["account.analytic.line"].create(
+                [
+                    {
+                        "name": "Running",
+                        # Real timers are stopped with different durations
+                        "date_time": start + timedelta(seconds=index),
+                        "employee_id": employee.id,
+                        "project_id": task.project_id.id,
+                        "task_id": task.id,
+                    }
+                    for index, (employee, task) in enumerate(
+                        zip(self.employees[:size], self.tasks, strict=False)
+                    )
+                ]
+            )
+            with self.measure("button_end_work", size):
+                lines.button_end_work()
+
+    def test_show_time_control(self):
+        lines = self.env["account.analytic.line"].search(
+            [("employee_id", "in", self.user.employee_ids.ids)]
+        )
+        for records in (self.projects, self.tasks, lines):
+            for size in self.sizes:
+                subset = records[:size].with_user(self.user)
+                with self.measure(f"{records._name}.show_time_control", size):
+                    subset.mapped("show_time_control")
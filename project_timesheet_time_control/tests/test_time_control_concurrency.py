@@ -0,0 +1,101 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import threading
+
+from psycopg2 import OperationalError
+
+import odoo
+from odoo import SUPERUSER_ID, api
+from odoo.service.model import PG_CONCURRENCY_ERRORS_TO_RETRY
+from odoo.tests import BaseCase, get_db_name, tagged
+from odoo.tools import mute_logger
+
+
+@tagged("-standard", "-at_install", "post_install", "time_control_stress")
+class TestTimeControlConcurrency(BaseCase):
+    """Fire concurrent timer switches for many employees.
+
+    These tests commit data, so they only run when their tag is requested.
+    """
+
+    employees_amount = 20
+    threads_per_employee = 3
+    switches_per_thread = 5
+
+    def setUp(self):
+        super().setUp()
+        self.registry = odoo.registry(get_db_name())
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            group = env.ref("hr_timesheet.group_hr_timesheet_user")
+            self.project_id = (
+                env["project.project"]
+                .create({"name": "Concurrency test", "allow_timesheets": True})
+                .id
+            )
+            users = env["res.users"].create(
+                [
+                    {
+                        "name": "Timer user %d" % index,
+                        "login": "timer_stress_%d" % index,
+                        "groups_id": [(4, group.id)],
+                    }
+                    for index in range(self.employees_amount)
+                ]
+            )
+            env["hr.employee"].create(
+                [{"name": user.name, "user_id": user.id} for user in users]
+            )
+            self.user_ids = users.ids
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            project = env["project.project"].browse(self.project_id)
+            project.timesheet_ids.unlink()
+            project.unlink()
+            users = env["res.users"].browse(self.user_ids)
+            partners = users.partner_id
+            users.employee_ids.unlink()
+            users.unlink()
+            partners.unlink()
+
+    def _switch(self, uid, retries):
+        """Switch timers repeatedly, retrying like the HTTP layer does."""
+        for _index in range(self.switches_per_thread):
+            while True:
+                with self.registry.cursor() as cr:
+                    env = api.Environment(cr, uid, {})
+                    try:
+                        env["account.analytic.line"]._switch_timer(self.project_id)
+                        cr.commit()
+                        break
+                    except OperationalError as error:
+                        if error.pgcode not in PG_CONCURRENCY_ERRORS_TO_RETRY:
+                            raise
+                        cr.rollback()
+                        retries.append(uid)
+
+    @mute_logger("odoo.sql_db")
+    def test_concurrent_switches(self):
+        """Concurrent switches never leave two running timers."""
+        retries = []
+        threads = [
+            threading.Thread(target=self._switch, args=(uid, retries))
+            for uid in self.user_ids
+            for _index in range(self.threads_per_employee)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            users = env["res.users"].browse(self.user_ids)
+            running = env["account.analytic.line"]._running_timers(users=users)
+            self.assertEqual(running.user_id, users)
+            self.assertEqual(len(running), len(users))
+        # Each switch may only need to be retried once per concurrent thread
+        switches = len(threads) * self.switches_per_thread
+        self.assertLessEqual(len(retries), switches * (self.threads_per_employee - 1))
@@ -1 +1,4 @@
 from . import hr_timesheet_switch
+from . import hr_timesheet_time_control_export
+from . import hr_timesheet_time_control_import
+from . import res_config_settings
@@ -28,6 +28,12 @@ class HrTimesheetSwitch(models.TransientModel):
     analytic_line_id = fields.Many2one(
         comodel_name="account.analytic.line", string="Origin line"
     )
+    recent_activity_id = fields.Many2one(
+        comodel_name="hr.timesheet.time_control.recent",
+        string="Recent activity",
+        domain=lambda self: [("employee_id", "in", self.env.user.employee_ids.ids)],
+        help="Pick something you timed recently to work on it again.",
+    )
     name = fields.Char(string="Description", required=True)
     date_time = fields.Datetime(
         string="Start Time", default=fields.Datetime.now, required=True
@@ -97,14 +103,11 @@ class HrTimesheetSwitch(models.TransientModel):
         """Obtain running timer."""
         employee = employee or self.env.user.employee_ids
         # Find running work
-        running = self.env["account.analytic.line"].search(
-            [
-                ("date_time", "!=", False),
-                ("employee_id", "in", employee.ids),
-                ("id", "not in", self.env.context.get("resuming_lines", [])),
-                ("project_id", "!=", False),
-                ("unit_amount", "=", 0),
-            ]
+        resuming = self.env.context.get("resuming_lines", [])
+        running = (
+            self.env["account.analytic.line"]
+            ._running_timers(employees=employee)
+            .filtered(lambda line: line.id not in resuming)
         )
         if len(running) > 1:
             raise UserError(
@@ -127,6 +130,11 @@ class HrTimesheetSwitch(models.TransientModel):
                     one.date_time,
                 )
 
+    @api.onchange("recent_activity_id")
+    def _onchange_recent_activity_id(self):
+        if self.recent_activity_id:
+            self.update(self._prepare_default_values(self.recent_activity_id.line_id))
+
     @api.model
     def _closest_suggestion(self):
         """Find most similar account.analytic.line record."""
@@ -144,6 +152,12 @@ class HrTimesheetSwitch(models.TransientModel):
             ]
         else:
             return self.env[model]
+        # Recently timed activities answer most requests without the history
+        recent = (
+            self.env["hr.timesheet.time_control.recent"].sudo().search(domain, limit=1)
+        )
+        if recent:
+            return recent.line_id.sudo(False)
         return self.env["account.analytic.line"].search(
             domain,
             order="date_time DESC",
@@ -181,19 +195,23 @@ class HrTimesheetSwitch(models.TransientModel):
     def action_switch(self):
         """Stop old timer, start new one."""
         self.ensure_one()
+        # Other tabs or devices may have started a timer since the wizard opened
+        employee = self.running_timer_id.employee_id or self.env.user.employee_ids
+        self.env["account.analytic.line"]._lock_timers(employee)
+        running = self.running_timer_id | self._default_running_timer_id(employee)
         # Stop old timer
-        self.with_context(
+        running.with_context(
             resuming_lines=self.ids,
             stop_dt=self.date_time,
-        ).running_timer_id.button_end_work()
+        ).button_end_work()
         # Start new timer
         if self.analytic_line_id:
             new = self.analytic_line_id.copy(self._prepare_copy_values(self))
         else:
-            fields = self.env["account.analytic.line"]._fields.keys()
-            vals = self.env["account.analytic.line"].default_get(fields)
-            vals.update(self._prepare_copy_values(self))
-            new = self.env["account.analytic.line"].create(vals)
+            # Missing values are filled with their defaults by create()
+            new = self.env["account.analytic.line"].create(
+                self._prepare_copy_values(self)
+            )
         # Display created timer record if requested
         if self.env.context.get("show_created_timer"):
             form_view = self.env.ref("hr_timesheet.hr_timesheet_line_form")
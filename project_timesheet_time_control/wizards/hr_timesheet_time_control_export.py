@@ -0,0 +1,31 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from urllib.parse import urlencode
+
+from odoo import fields, models
+
+
+class HrTimesheetTimeControlExport(models.TransientModel):
+    _name = "hr.timesheet.time_control.export"
+    _description = "Export time controlled timesheet lines"
+
+    date_from = fields.Date(required=True)
+    date_to = fields.Date(required=True, default=fields.Date.context_today)
+    file_format = fields.Selection(
+        selection=[("csv", "CSV"), ("xlsx", "Excel")],
+        required=True,
+        default="csv",
+    )
+
+    def action_export(self):
+        self.ensure_one()
+        params = {
+            "date_from": fields.Date.to_string(self.date_from),
+            "date_to": fields.Date.to_string(self.date_to),
+            "file_format": self.file_format,
+        }
+        return {
+            "type": "ir.actions.act_url",
+            "url": "/project_timesheet_time_control/export?%s" % urlencode(params),
+            "target": "self",
+        }
@@ -0,0 +1,56 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import io
+
+from odoo import _, fields, models
+
+
+class HrTimesheetTimeControlImport(models.TransientModel):
+    _name = "hr.timesheet.time_control.import"
+    _description = "Import time clock exports as timesheet lines"
+
+    # Stored as an attachment, so the import reads it from the filestore
+    data_file = fields.Binary(string="File", required=True)
+    filename = fields.Char()
+    file_format = fields.Selection(
+        selection=[("csv", "CSV"), ("jsonl", "JSON Lines")],
+        required=True,
+        default="csv",
+        help="Rows need employee (name or badge), project, task, name, "
+        "date_time and date_time_end columns, with times in UTC.",
+    )
+
+    def _open_data_file(self):
+        """Binary file object streaming the uploaded file."""
+        attachment = (
+            self.env["ir.attachment"]
+            .sudo()
+            .search(
+                [
+                    ("res_model", "=", self._name),
+                    ("res_field", "=", "data_file"),
+                    ("res_id", "=", self.id),
+                ],
+                limit=1,
+            )
+        )
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), "rb")
+        # Attachments stored in the database are only available whole
+        return io.BytesIO(attachment.raw or b"")
+
+    def action_import(self):
+        self.ensure_one()
+        with self._open_data_file() as file:
+            imported = self.env["account.analytic.line"]._import_time_clock(
+                file, self.file_format
+            )
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "type": "success",
+                "message": _("%d timesheet lines imported.") % imported,
+                "next": {"type": "ir.actions.act_window_close"},
+            },
+        }
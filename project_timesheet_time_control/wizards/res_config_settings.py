@@ -0,0 +1,16 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import fields, models
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = "res.config.settings"
+
+    timesheet_timer_max_duration = fields.Float(
+        related="company_id.timesheet_timer_max_duration",
+        readonly=False,
+    )
+    timesheet_prevent_overlap = fields.Boolean(
+        related="company_id.timesheet_prevent_overlap",
+        readonly=False,
+    )